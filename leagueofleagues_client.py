@@ -5,30 +5,55 @@ import os
 import time
 import json
 import configparser
+import argparse
+import gc
+import tracemalloc
+import socket
+import secrets
+import hmac
 import hashlib
 import webbrowser
 import asyncio
 import queue
-from functools import partial
+from functools import partial, wraps
 import traceback
+import concurrent.futures
+import struct
+import gzip
+import uuid
+import base64
+import importlib
+import io
+import zipfile
+from array import array
+from collections import Counter, deque
 
 # GUI-related imports
 import tkinter as tk
-from tkinter import simpledialog, messagebox
 
 # Network and API imports
 import requests
 
 # System tray icon
 import pystray
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image
+
+# Optional faster JSON decoder for LCU payloads
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # League client connector
+import psutil
 from lcu_driver import Connector
+from lcu_driver.connection import Connection
+from lcu_driver.events.managers import ConnectorEventManager, WebsocketEventManager
+from lcu_driver.events.responses import WebsocketEventResponse
 
-# Path to settings file
-def get_config_path():
-    """Return path to settings file in user's AppData directory."""
+# Path to files in the user's AppData directory
+def get_app_data_path(filename):
+    """Return path to a file in user's AppData directory."""
     try:
         # Get the AppData\Local directory path
         app_data = os.path.join(os.environ.get('LOCALAPPDATA', ''), 'LeagueOfLeagues')
@@ -37,26 +62,75 @@ def get_config_path():
         if not os.path.exists(app_data):
             os.makedirs(app_data)
             
-        return os.path.join(app_data, 'settings.cfg')
+        return os.path.join(app_data, filename)
     except Exception as e:
-        print(f"Error setting config path: {e}")
+        print(f"Error setting path for {filename}: {e}")
         # Fallback to current directory as last resort
-        return os.path.join(os.getcwd(), 'settings.cfg')
+        return os.path.join(os.getcwd(), filename)
+
+# Path to settings file
+def get_config_path():
+    """Return path to settings file in user's AppData directory."""
+    return get_app_data_path('settings.cfg')
 
 # --------------------------
 # Global variables
 # --------------------------
 CONFIG_PATH = get_config_path()
+INSTANCE_LOCK_PATH = get_app_data_path('instance.lock')
+INSTANCE_PORT_PATH = get_app_data_path('instance.port')
+PHASE_TIMELINE_PATH = get_app_data_path('phase_timeline.bin')
+PHASE_TIMELINE_EXPORT_PATH = get_app_data_path('phase_timeline.json')
+
+# Optional on/off settings read from settings.cfg
+BOOLEAN_SETTINGS = ('low_memory', 'persist_timeline', 'telemetry')
+
+# Backend circuit breaker: failures within the window that open it, and how long it stays open
+BACKEND_TIMEOUT = 10
+BACKEND_FAILURE_THRESHOLD = 3
+BACKEND_FAILURE_WINDOW = 60
+BACKEND_RESET_TIMEOUT = 30
+
+# How often endpoint round-trip times are re-measured, and the smoothing applied to them
+ENDPOINT_PROBE_INTERVAL = 300
+ENDPOINT_RTT_SMOOTHING = 0.3
+
+# Cached auth tokens are trusted until they expire, and revalidated in the background this close to expiry
+AUTH_TOKEN_REFRESH_WINDOW = 24 * 3600
+
+# Client version reported with telemetry
+CLIENT_VERSION = "1.0.0"
+
+# Telemetry buffering: events kept in memory, batch size that triggers a flush, and flush timer
+TELEMETRY_MAX_EVENTS = 1000
+TELEMETRY_BATCH_SIZE = 200
+TELEMETRY_FLUSH_INTERVAL = 300
+
+# Tray notification limits (the Windows balloon holds 256 WCHARs of text and 64 of title, both NUL-terminated)
+NOTIFY_MAX_MESSAGE = 255
+NOTIFY_MAX_TITLE = 63
+
+# Sampling profiler started from the Diagnostics menu: sample period, longest run, deepest stack kept
+PROFILER_INTERVAL = 0.01
+PROFILER_MAX_SECONDS = 600
+PROFILER_MAX_DEPTH = 64
 
 # API endpoints
+# Default backend; settings.cfg can list more in api_endpoints and the fastest healthy one is used
 API_BASE = "https://rust.gameras.gr"
-OTP_URL = f"{API_BASE}/otp"
-AUTH_URL = f"{API_BASE}/auth"
-VERSION_URL = f"{API_BASE}/client_version"
-DOWNLOAD_URL = f"{API_BASE}/downloadclient"
-JOINMATCH_URL = f"{API_BASE}/joinmatch"
+OTP_PATH = "/otp"
+AUTH_PATH = "/auth"
+VERSION_PATH = "/client_version"
+DOWNLOAD_PATH = "/downloadclient"
+JOINMATCH_PATH = "/joinmatch"
+TELEMETRY_PATH = "/telemetry"
 GAMEFLOW_PHASE = "/lol-gameflow/v1/gameflow-phase"
 
+# League client process names and how often to look for them
+LCU_PROCESS_NAMES = ('LeagueClientUx.exe', 'LeagueClientUx')
+LCU_POLL_INTERVAL = 0.5
+LCU_RETRY_DELAY = 10
+
 # Global application state
 summoner_name = None
 summoner_tag = None
@@ -68,7 +142,456 @@ dialog_active = False  # Flag to prevent multiple dialogs
 root = None  # Main Tkinter window
 ui_lock = threading.Lock()  # Thread lock for UI operations
 connector = None  # Will be initialized in main thread
-connector_thread = None  # Thread for running connector
+runtime = None  # Owns the asyncio loop and worker pool, see AppRuntime
+phase_timeline = None  # PhaseTimeline of gameflow transitions
+telemetry = None  # TelemetryBuffer, only created when the player opted in
+actions = None  # ActionExecutor for tray menu actions
+backend_monitor_wake = None  # asyncio.Event that wakes monitor_backends() when a circuit opens
+traffic_recorder = None  # TrafficRecorder while --record-traffic is active
+dialog_windows = {}  # Pre-built dialog windows by class, reused between prompts
+profiler = None  # SamplingProfiler while one is running or holds the last run's samples
+low_memory_mode = False  # Build GUI resources per dialog and unload PIL helpers after startup
+instance_lock_file = None  # Held open for the lifetime of the process
+
+# --------------------------
+# Runtime
+# --------------------------
+class AppRuntime:
+    """Owns the asyncio loop used for LCU and backend I/O plus a bounded worker pool.
+    
+    Any thread can hand work to the runtime and gets a concurrent.futures.Future
+    back, so in-flight operations can be listed, waited on or cancelled.
+    """
+    
+    def __init__(self, max_workers=4):
+        self.loop = asyncio.new_event_loop()
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='lol-worker')
+        self._thread = None
+        self._pending = {}  # Future -> (name, start time)
+        self._lock = threading.Lock()
+    
+    def start(self):
+        """Start the event loop thread."""
+        def run_loop():
+            asyncio.set_event_loop(self.loop)
+            self.loop.run_forever()
+        
+        self._thread = threading.Thread(target=run_loop, daemon=True, name='lol-runtime')
+        self._thread.start()
+        return self
+    
+    def _track(self, future, name):
+        with self._lock:
+            self._pending[future] = (name, time.monotonic())
+        
+        def forget(done):
+            with self._lock:
+                self._pending.pop(done, None)
+            if not done.cancelled() and done.exception() is not None:
+                print(f"[RUNTIME] {name} failed: {done.exception()}")
+        
+        future.add_done_callback(forget)
+        return future
+    
+    def submit(self, coro, name=None):
+        """Schedule a coroutine on the runtime loop from any thread."""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        return self._track(future, name or getattr(coro, '__qualname__', 'coroutine'))
+    
+    def run_blocking(self, func, *args, name=None, **kwargs):
+        """Run a blocking call on the worker pool from any thread."""
+        future = self._executor.submit(func, *args, **kwargs)
+        return self._track(future, name or getattr(func, '__name__', 'call'))
+    
+    async def call_blocking(self, func, *args, **kwargs):
+        """Await a blocking call from code running on the runtime loop."""
+        return await self.loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+    
+    def in_flight(self):
+        """Return (name, seconds running) for every operation that hasn't finished."""
+        now = time.monotonic()
+        with self._lock:
+            return [(name, now - started) for name, started in self._pending.values()]
+    
+    def cancel_all(self):
+        """Cancel every in-flight operation. Running pool calls finish but their results are dropped."""
+        with self._lock:
+            futures = list(self._pending)
+        for future in futures:
+            future.cancel()
+        return len(futures)
+    
+    def shutdown(self, timeout=2):
+        """Cancel outstanding work and stop the loop and worker pool."""
+        self.cancel_all()
+        self._executor.shutdown(wait=False)
+        if self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        if self._thread:
+            self._thread.join(timeout)
+
+# --------------------------
+# Backend access
+# --------------------------
+class BackendError(Exception):
+    """The backend answered, but not in a way we understand."""
+
+class BackendUnavailable(BackendError):
+    """The backend couldn't be reached, or the circuit breaker is open."""
+
+class CircuitBreaker:
+    """Tracks recent backend failures and fails fast while the server looks down.
+    
+    The circuit opens after failure_threshold network errors or 5xx responses
+    within failure_window seconds. While open, calls fail immediately; after
+    reset_timeout a single trial call is let through (half-open) and its result
+    closes or re-opens the circuit.
+    """
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, failure_threshold=BACKEND_FAILURE_THRESHOLD,
+                 failure_window=BACKEND_FAILURE_WINDOW, reset_timeout=BACKEND_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.failure_window = failure_window
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.opened_at = None
+        self.last_error = None
+        self.last_success = None
+        self.last_rtt = None
+        self._failures = deque()
+        self._lock = threading.Lock()
+    
+    def allow(self):
+        """Return True if a call may go to the backend now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                # Let exactly one trial call through
+                self.state = self.HALF_OPEN
+                return True
+            return False
+    
+    def record_success(self, rtt=None):
+        with self._lock:
+            self.state = self.CLOSED
+            self.opened_at = None
+            self.last_error = None
+            self.last_success = time.monotonic()
+            if rtt is not None:
+                self.last_rtt = rtt
+            self._failures.clear()
+    
+    def record_failure(self, error):
+        """Count a failure. Returns True if this failure opened the circuit."""
+        now = time.monotonic()
+        with self._lock:
+            self.last_error = str(error)
+            self._failures.append(now)
+            while self._failures and now - self._failures[0] > self.failure_window:
+                self._failures.popleft()
+            
+            if self.state == self.HALF_OPEN or (
+                    self.state == self.CLOSED and len(self._failures) >= self.failure_threshold):
+                self.state = self.OPEN
+                self.opened_at = now
+                return True
+            if self.state == self.OPEN:
+                self.opened_at = now
+            return False
+    
+    @property
+    def healthy(self):
+        """Closed, and nothing has failed since the last success."""
+        return self.state == self.CLOSED and self.last_error is None
+    
+    def status_text(self):
+        """Short, cached description of server health for status displays."""
+        if self.state == self.CLOSED:
+            if self.last_success is None:
+                return "Not checked yet"
+            ago = format_duration(time.monotonic() - self.last_success)
+            rtt = f", {self.last_rtt * 1000:.0f} ms" if self.last_rtt is not None else ""
+            errors = f", {len(self._failures)} recent errors" if self._failures else ""
+            return f"Reachable (checked {ago} ago{rtt}{errors})"
+        down_for = format_duration(time.monotonic() - self.opened_at) if self.opened_at else "0s"
+        return f"Server unreachable (for {down_for})"
+
+class BackendEndpoint:
+    """One backend base URL with its own circuit breaker and smoothed round-trip time."""
+    
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.breaker = CircuitBreaker()
+        self.rtt = None
+    
+    def url(self, path):
+        return self.base_url + path
+    
+    def observe_rtt(self, seconds):
+        if self.rtt is None:
+            self.rtt = seconds
+        else:
+            self.rtt += ENDPOINT_RTT_SMOOTHING * (seconds - self.rtt)
+
+class EndpointSelector:
+    """Orders backend endpoints for each call: healthy ones by round-trip time, then failing, then open."""
+    
+    def __init__(self, base_urls):
+        self.endpoints = [BackendEndpoint(url) for url in base_urls]
+        self._lock = threading.Lock()
+    
+    def candidates(self):
+        """Return endpoints in the order calls should try them."""
+        with self._lock:
+            endpoints = list(self.endpoints)
+        
+        def sort_key(endpoint):
+            breaker = endpoint.breaker
+            if breaker.healthy:
+                rank = 0
+            elif breaker.state == CircuitBreaker.CLOSED:
+                rank = 1  # Failing but not yet open
+            else:
+                rank = 2
+            # Unmeasured endpoints go after measured ones, keeping the configured order
+            rtt = endpoint.rtt if endpoint.rtt is not None else float('inf')
+            return (rank, rtt)
+        
+        return sorted(endpoints, key=sort_key)
+    
+    def best(self):
+        return self.candidates()[0]
+    
+    def any_open(self):
+        return any(endpoint.breaker.state != CircuitBreaker.CLOSED for endpoint in self.endpoints)
+    
+    def status_text(self):
+        """Short, cached description of server health for status displays."""
+        best = self.best()
+        if len(self.endpoints) == 1 or best.breaker.state != CircuitBreaker.CLOSED:
+            return best.breaker.status_text()
+        # Only endpoints that answered and haven't failed since count as up
+        healthy = sum(1 for e in self.endpoints if e.breaker.healthy and e.breaker.last_success is not None)
+        host = best.base_url.split('://', 1)[-1]
+        return f"{best.breaker.status_text()} via {host}, {healthy}/{len(self.endpoints)} endpoints up"
+
+backend_endpoints = EndpointSelector([API_BASE])
+
+def backend_url(path):
+    """Full URL of path on the currently preferred endpoint, for links shown to the player."""
+    return backend_endpoints.best().url(path)
+
+def backend_request(method, path, **kwargs):
+    """Call the backend through the per-endpoint circuit breakers.
+    
+    Endpoints are tried fastest healthy one first; on network errors or 5xx the
+    call fails over to the next. Raises BackendUnavailable when none of them
+    answered or all circuits are open. Any other response is returned for the
+    caller to judge.
+    """
+    kwargs.setdefault('timeout', BACKEND_TIMEOUT)
+    errors = []
+    
+    for endpoint in backend_endpoints.candidates():
+        if not endpoint.breaker.allow():
+            continue
+        
+        start = time.perf_counter()
+        try:
+            resp = requests.request(method, endpoint.url(path), **kwargs)
+        except requests.RequestException as e:
+            print(f"[BACKEND] {endpoint.base_url}{path} failed: {e}")
+            backend_failed(endpoint, e)
+            errors.append(f"Server unreachable ({describe_error(e)})")
+            continue
+        
+        if resp.status_code >= 500:
+            backend_failed(endpoint, f"HTTP {resp.status_code}")
+            errors.append(f"Server error: HTTP {resp.status_code}")
+            continue
+        
+        elapsed = time.perf_counter() - start
+        endpoint.breaker.record_success(elapsed)
+        endpoint.observe_rtt(elapsed)
+        return resp
+    
+    raise BackendUnavailable(errors[-1] if errors else backend_endpoints.status_text())
+
+def backend_failed(endpoint, error):
+    """Record a backend failure and wake the monitor if it opened the endpoint's circuit."""
+    if endpoint.breaker.record_failure(error):
+        print(f"[BACKEND] Circuit opened for {endpoint.base_url}: {error}")
+        record_metric('backend_circuit_open', endpoint=endpoint.base_url, error=str(error)[:200])
+        if runtime is not None and backend_monitor_wake is not None:
+            runtime.loop.call_soon_threadsafe(backend_monitor_wake.set)
+
+def probe_endpoint(endpoint):
+    """Measure one endpoint's round-trip time and update its circuit breaker."""
+    start = time.perf_counter()
+    try:
+        resp = requests.get(endpoint.url(VERSION_PATH), timeout=BACKEND_TIMEOUT)
+    except requests.RequestException as e:
+        endpoint.breaker.record_failure(e)
+        return False
+    
+    if resp.status_code >= 500:
+        endpoint.breaker.record_failure(f"HTTP {resp.status_code}")
+        return False
+    
+    elapsed = time.perf_counter() - start
+    if endpoint.breaker.state != CircuitBreaker.CLOSED:
+        print(f"[BACKEND] {endpoint.base_url} reachable again, circuit closed")
+    endpoint.breaker.record_success(elapsed)
+    endpoint.observe_rtt(elapsed)
+    return True
+
+async def monitor_backends():
+    """Re-measure endpoint RTTs periodically and probe open circuits until they recover."""
+    global backend_monitor_wake
+    backend_monitor_wake = asyncio.Event()
+    
+    while True:
+        # Single-endpoint setups only need probing while the circuit is open
+        endpoints = backend_endpoints.endpoints
+        if len(endpoints) > 1 or backend_endpoints.any_open():
+            await asyncio.gather(*(runtime.call_blocking(probe_endpoint, e) for e in endpoints))
+        
+        delay = BACKEND_RESET_TIMEOUT if backend_endpoints.any_open() else ENDPOINT_PROBE_INTERVAL
+        try:
+            await asyncio.wait_for(backend_monitor_wake.wait(), timeout=delay)
+            # A circuit just opened; give the server a moment before probing it
+            backend_monitor_wake.clear()
+            await asyncio.sleep(BACKEND_RESET_TIMEOUT)
+        except asyncio.TimeoutError:
+            pass
+
+def configure_backend_endpoints(base_urls):
+    """Use the given backend base URLs, falling back to API_BASE if the list is empty."""
+    global backend_endpoints
+    backend_endpoints = EndpointSelector(base_urls or [API_BASE])
+    return backend_endpoints
+
+# --------------------------
+# Telemetry
+# --------------------------
+class TelemetryBuffer:
+    """Opt-in, bounded buffer of client measurements sent to the backend in gzip batches.
+    
+    record() only appends to a deque and is safe to call from any thread. Sending
+    happens from run() on the runtime loop, with the HTTP call on the worker pool.
+    Batches that can't be delivered are dropped rather than retried.
+    """
+    
+    def __init__(self, path, max_events=TELEMETRY_MAX_EVENTS, batch_size=TELEMETRY_BATCH_SIZE,
+                 flush_interval=TELEMETRY_FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.session_id = uuid.uuid4().hex
+        self.sent = 0
+        self.dropped = 0
+        self._events = deque(maxlen=max_events)
+        self._lock = threading.Lock()
+        self._loop = None
+        self._wake = None
+    
+    def __len__(self):
+        return len(self._events)
+    
+    def record(self, kind, **fields):
+        """Buffer one measurement. The oldest event is dropped when the buffer is full."""
+        event = {'t': round(time.time(), 3), 'kind': kind}
+        event.update(fields)
+        
+        with self._lock:
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1
+            self._events.append(event)
+            size = len(self._events)
+        
+        # Past the size threshold, wake the flusher instead of sending from the caller
+        if size >= self.batch_size and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+    
+    def take_batch(self):
+        """Remove and return up to batch_size buffered events."""
+        with self._lock:
+            count = min(self.batch_size, len(self._events))
+            return [self._events.popleft() for _ in range(count)]
+    
+    def encode_batch(self, events):
+        """Serialize a batch as gzip-compressed JSON."""
+        payload = {
+            'client_version': CLIENT_VERSION,
+            'session': self.session_id,
+            'platform': sys.platform,
+            'events': events,
+        }
+        return gzip.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+    
+    def send_batch(self, events, timeout=10):
+        """POST one batch. Returns True if the collector accepted it.
+        
+        Goes straight to the preferred endpoint rather than through backend_request(),
+        so a broken telemetry route never opens the circuit that guards joins and sign-in.
+        """
+        endpoint = backend_endpoints.best()
+        delivered = False
+        if endpoint.breaker.state == CircuitBreaker.OPEN:
+            print("Telemetry upload skipped: server unreachable")
+        else:
+            try:
+                resp = requests.post(
+                    endpoint.url(self.path),
+                    data=self.encode_batch(events),
+                    headers={'Content-Type': 'application/json', 'Content-Encoding': 'gzip'},
+                    timeout=timeout,
+                )
+                delivered = 200 <= resp.status_code < 300
+                if not delivered:
+                    print(f"Telemetry upload rejected: HTTP {resp.status_code}")
+            except requests.RequestException as e:
+                print(f"Telemetry upload failed: {e}")
+        
+        if delivered:
+            self.sent += len(events)
+        else:
+            # Offline or rejected: drop the batch, telemetry must never pile up
+            self.dropped += len(events)
+        return delivered
+    
+    def flush_now(self, timeout=2):
+        """Send whatever is buffered from the calling thread, used on exit."""
+        while len(self._events):
+            if not self.send_batch(self.take_batch(), timeout=timeout):
+                break
+    
+    async def run(self):
+        """Flush on the timer or when the buffer reaches batch_size. Runs on the runtime loop."""
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            
+            while len(self._events):
+                if not await runtime.call_blocking(self.send_batch, self.take_batch()):
+                    break
+
+def record_metric(kind, **fields):
+    """Add a measurement to the telemetry buffer, if the player opted in."""
+    if telemetry is not None:
+        telemetry.record(kind, **fields)
 
 # --------------------------
 # UI helpers
@@ -120,85 +643,279 @@ def center_window(window):
     # Set the position
     window.geometry(f"{window_width}x{window_height}+{x}+{y}")
 
-def show_dialog(dialog_type, title, message, parent=None):
-    """Show a dialog with proper handling of the root window."""
+def release_root_window():
+    """Destroy the root window between dialogs when running in low-memory mode."""
     global root
     
+    if not low_memory_mode or root is None:
+        return
+    
+    # A dialog further up the call stack is still waiting in its own event loop
+    if DialogWindow.showing:
+        return
+    
     try:
-        ensure_root_window()
-        
-        # Make sure root is deiconified and updated before showing dialog
-        root.deiconify()
-        root.update()
+        root.destroy()
+    except Exception:
+        pass
+    root = None
+    dialog_windows.clear()
+    
+    # Tk keeps a lot of cyclic references; collect them now instead of at the next GC pass
+    gc.collect()
+
+class DialogWindow:
+    """A hidden Toplevel built once and shown again for every dialog.
+    
+    Building widgets and centering a window costs more than a frame, so the
+    window is laid out and positioned up front and a dialog only swaps the
+    texts and maps it. The time from the triggering click to the window
+    taking focus is logged and sent as telemetry.
+    """
+    
+    WIDTH = 380
+    HEIGHT = 170
+    
+    showing = 0  # Dialogs of any kind currently waiting for the player
+    
+    def __init__(self, master):
+        self.window = tk.Toplevel(master)
+        self.window.withdraw()
+        self.window.resizable(False, False)
+        self.window.attributes('-topmost', True)
+        self.window.protocol("WM_DELETE_WINDOW", lambda: self.close(None))
+        self.window.bind('<Escape>', lambda e: self.close(None))
+        
+        self.busy = False
+        self.result = None
+        self.last_latency_ms = None
+        self._done = tk.IntVar(self.window, 0)
+        self._title = None
+        self._started = None
+        
+        self.frame = tk.Frame(self.window, padx=15, pady=15)
+        self.frame.pack(fill=tk.BOTH, expand=True)
+        self.build(self.frame)
+        
+        # Bound once: every bind() call registers a Tcl command that lives as long as the window
+        self.window.bind('<FocusIn>', self._focused)
+        
+        # Position once; the screen size doesn't change between prompts
+        x = (self.window.winfo_screenwidth() - self.WIDTH) // 2
+        y = (self.window.winfo_screenheight() - self.HEIGHT) // 2
+        self.window.geometry(f"{self.WIDTH}x{self.HEIGHT}+{x}+{y}")
+        self.window.update_idletasks()
+    
+    def build(self, frame):
+        raise NotImplementedError
+    
+    def focus_widget(self):
+        return self.window
+    
+    def run(self, title, started=None):
+        """Show the window and wait until it is closed. Returns the dialog result."""
+        self.busy = True
+        self.result = None
+        self._title = title
+        self._started = started if started is not None else time.perf_counter()
+        
+        focus = self.focus_widget()
+        self.window.title(title)
+        self.window.deiconify()
+        self.window.lift()
+        focus.focus_force()
+        try:
+            self.window.grab_set()
+        except tk.TclError:
+            # Some window managers refuse a grab until the window is mapped; the dialog works without it
+            pass
         
-        # Center the root window
-        center_window(root)
+        DialogWindow.showing += 1
+        try:
+            self.window.wait_variable(self._done)
+        finally:
+            DialogWindow.showing -= 1
+            self.window.grab_release()
+            self.window.withdraw()
+            self.busy = False
+        return self.result
+    
+    def close(self, result):
+        self.result = result
+        self._done.set(self._done.get() + 1)
+    
+    def destroy(self):
+        try:
+            self.window.destroy()
+        except tk.TclError:
+            pass
+    
+    def _focused(self, event):
+        # The Toplevel binding also sees focus moving between its other widgets
+        if self._started is None or str(event.widget) != str(self.focus_widget()):
+            return
+        ms = (time.perf_counter() - self._started) * 1000
+        self._started = None
+        self.last_latency_ms = ms
+        print(f"[UI] '{self._title}' ready for input in {ms:.1f} ms")
+        record_metric('dialog_latency', dialog=type(self).__name__, ms=round(ms, 1))
+
+class PromptWindow(DialogWindow):
+    """Reusable text prompt for match passwords, registration codes and Name#Tag."""
+    
+    def build(self, frame):
+        self.label = tk.Label(frame, justify=tk.LEFT, anchor=tk.W, wraplength=self.WIDTH - 30)
+        self.label.pack(fill=tk.X)
+        
+        self.entry = tk.Entry(frame)
+        self.entry.pack(fill=tk.X, pady=10)
+        self.entry.bind('<Return>', lambda e: self.close(self.entry.get()))
+        
+        buttons = tk.Frame(frame)
+        buttons.pack(side=tk.BOTTOM, fill=tk.X)
+        tk.Button(buttons, text="Cancel", width=10, command=lambda: self.close(None)).pack(side=tk.RIGHT)
+        tk.Button(buttons, text="OK", width=10,
+                  command=lambda: self.close(self.entry.get())).pack(side=tk.RIGHT, padx=5)
+    
+    def focus_widget(self):
+        return self.entry
+    
+    def ask(self, title, prompt, started=None):
+        self.label.config(text=prompt)
+        self.entry.delete(0, tk.END)
+        return self.run(title, started)
+
+class MessageWindow(DialogWindow):
+    """Reusable info/error/warning/yes-no window shown in place of a messagebox."""
+    
+    ICONS = {"info": "info", "error": "error", "warning": "warning", "yesno": "question"}
+    
+    def build(self, frame):
+        body = tk.Frame(frame)
+        body.pack(fill=tk.BOTH, expand=True)
+        self.icon = tk.Label(body)
+        self.icon.pack(side=tk.LEFT, anchor=tk.N, padx=(0, 10))
+        self.label = tk.Label(body, justify=tk.LEFT, anchor=tk.NW, wraplength=self.WIDTH - 80)
+        self.label.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        # Both button rows exist up front, a dialog only picks which one is packed
+        self.ok_buttons = tk.Frame(frame)
+        self.ok_button = tk.Button(self.ok_buttons, text="OK", width=10, command=lambda: self.close("ok"))
+        self.ok_button.pack(side=tk.RIGHT)
+        
+        self.yesno_buttons = tk.Frame(frame)
+        tk.Button(self.yesno_buttons, text="No", width=10, command=lambda: self.close(False)).pack(side=tk.RIGHT)
+        self.yes_button = tk.Button(self.yesno_buttons, text="Yes", width=10, command=lambda: self.close(True))
+        self.yes_button.pack(side=tk.RIGHT, padx=5)
+        
+        self.window.bind('<Return>', lambda e: self.close(True if self.kind == "yesno" else "ok"))
+        self.kind = None
+    
+    def focus_widget(self):
+        return self.yes_button if self.kind == "yesno" else self.ok_button
+    
+    def show(self, kind, title, message, started=None):
+        self.kind = kind
+        self.icon.config(bitmap=self.ICONS.get(kind, "info"))
+        self.label.config(text=message)
+        
+        if kind == "yesno":
+            self.ok_buttons.pack_forget()
+            self.yesno_buttons.pack(side=tk.BOTTOM, fill=tk.X)
+        else:
+            self.yesno_buttons.pack_forget()
+            self.ok_buttons.pack(side=tk.BOTTOM, fill=tk.X)
         
-        # Show the appropriate dialog
-        if dialog_type == "info":
-            result = messagebox.showinfo(title, message, parent=root)
-        elif dialog_type == "error":
-            result = messagebox.showerror(title, message, parent=root)
-        elif dialog_type == "warning":
-            result = messagebox.showwarning(title, message, parent=root)
-        elif dialog_type == "yesno":
-            result = messagebox.askyesno(title, message, parent=root)
-            return result
-        
-        # Hide the root window again after dialog is closed
-        root.withdraw()
+        result = self.run(title, started)
+        # Closing a yes/no question any other way counts as "no"
+        if kind == "yesno":
+            return bool(result)
         return result
-        
+
+def prewarm_dialogs():
+    """Build the dialog windows now so the first prompt opens as fast as later ones."""
+    ensure_root_window()
+    for cls in (PromptWindow, MessageWindow):
+        if cls not in dialog_windows:
+            dialog_windows[cls] = cls(root)
+
+def acquire_dialog_window(cls):
+    """Return the shared window of this class, or a one-off if it is already showing."""
+    ensure_root_window()
+    window = dialog_windows.get(cls)
+    if window is None:
+        window = dialog_windows[cls] = cls(root)
+    if window.busy:
+        return cls(root)
+    return window
+
+def release_dialog_window(window):
+    """Destroy one-off windows; the shared ones stay hidden for next time."""
+    if dialog_windows.get(type(window)) is not window:
+        window.destroy()
+    release_root_window()
+
+def show_dialog(dialog_type, title, message, parent=None, started=None):
+    """Show a dialog in the reusable message window."""
+    window = None
+    try:
+        window = acquire_dialog_window(MessageWindow)
+        return window.show(dialog_type, title, message, started)
     except Exception as e:
         print(f"Error showing dialog: {e}")
         traceback.print_exc()
-        # Make sure root is withdrawn in case of error
-        try:
-            root.withdraw()
-        except:
-            pass
         return None
+    finally:
+        if window is not None:
+            release_dialog_window(window)
+        else:
+            release_root_window()
         
-def ask_for_input(title, prompt):
-    """Ask the user for text input with proper window management."""
-    global root
+def ask_for_input(title, prompt, started=None):
+    """Ask the user for text input in the reusable prompt window.
     
+    started is the perf_counter() time of the click that led here, for the
+    click-to-input latency measurement.
+    """
+    window = None
     try:
-        ensure_root_window()
-        
-        # Make root visible
-        root.deiconify()
-        root.update()
-        
-        # Center the window
-        center_window(root)
-        
-        # Get input from user
-        result = simpledialog.askstring(title, prompt, parent=root)
-        
-        # Hide the root window again
-        root.withdraw()
-        return result
+        window = acquire_dialog_window(PromptWindow)
+        return window.ask(title, prompt, started)
     except Exception as e:
         print(f"Error asking for input: {e}")
         traceback.print_exc()
-        # Make sure root is withdrawn in case of error
-        try:
-            root.withdraw()
-        except:
-            pass
         return None
+    finally:
+        if window is not None:
+            release_dialog_window(window)
+        else:
+            release_root_window()
 
 # --------------------------
 # Config helpers
 # --------------------------
 def load_config():
     config = configparser.ConfigParser()
-    result = {'discord_id': None}
+    result = {'discord_id': None, 'auth_token': None, 'api_endpoints': []}
+    result.update({name: False for name in BOOLEAN_SETTINGS})
     
     if os.path.exists(CONFIG_PATH):
         config.read(CONFIG_PATH)
         
+        # Optional features, all off unless set in the file
+        for name in BOOLEAN_SETTINGS:
+            try:
+                result[name] = config.getboolean('DEFAULT', name, fallback=False)
+            except ValueError:
+                result[name] = False
+        
+        # Extra backend mirrors, separated by commas or whitespace
+        raw = config.get('DEFAULT', 'api_endpoints', fallback='')
+        result['api_endpoints'] = raw.replace(',', ' ').split()
+        
+        # Cached auth token and the server key it is signed with
+        result['auth_token'] = config.get('DEFAULT', 'auth_token', fallback=None)
+        
         # Get Discord ID
         raw = config.get('DEFAULT', 'discord_id', fallback=None)
         try:
@@ -209,6 +926,10 @@ def load_config():
     return result
 
 def save_config(discord_id):
+    update_config(discord_id=discord_id)
+
+def update_config(**values):
+    """Write the given settings, keeping everything else in the file. None removes a setting."""
     config = configparser.ConfigParser()
     
     # Load existing config if it exists
@@ -220,46 +941,244 @@ def save_config(discord_id):
         config['DEFAULT'] = {}
     
     # Update settings
-    config['DEFAULT']['discord_id'] = discord_id
+    for name, value in values.items():
+        if value is None:
+            config['DEFAULT'].pop(name, None)
+        else:
+            config['DEFAULT'][name] = value
     
     with open(CONFIG_PATH, 'w') as f:
         config.write(f)
     
     print(f"Saved config to {CONFIG_PATH}")
 
-def delete_config():
-    """Delete the configuration file."""
+def delete_credentials():
+    """Forget the stored registration, keeping the player's other settings."""
     try:
         if os.path.exists(CONFIG_PATH):
-            os.remove(CONFIG_PATH)
-            print(f"Deleted config file: {CONFIG_PATH}")
+            update_config(discord_id=None, auth_token=None)
+            print(f"Removed stored credentials from {CONFIG_PATH}")
     except Exception as e:
-        print(f"Error deleting config file: {e}")
+        print(f"Error removing stored credentials: {e}")
 
 # --------------------------
 # Authentication functions
 # --------------------------
+def b64url_decode(value):
+    """Decode unpadded URL-safe base64."""
+    return base64.urlsafe_b64decode(value + '=' * (-len(value) % 4))
+
+def read_auth_token(token, discord_id, now=None):
+    """Return the expiry of a cached token issued for discord_id, or None.
+    
+    Tokens look like base64url(JSON claims).signature, with the claims holding
+    discord_id and exp (a Unix timestamp). The signature isn't checked: the
+    token sits next to the Discord ID in the user's own settings file, so it is
+    only a cache of when the server last vouched for the registration, not proof.
+    """
+    if not token:
+        return None
+    if now is None:
+        now = time.time()
+    
+    try:
+        claims = json.loads(b64url_decode(token.split('.')[0]))
+        expires = float(claims['exp'])
+    except (ValueError, KeyError, TypeError) as e:
+        print(f"Ignoring cached auth token: {type(e).__name__}")
+        return None
+    
+    if str(claims.get('discord_id')) != str(discord_id) or expires <= now:
+        return None
+    return expires
+
+def store_auth_token(discord_id, token):
+    """Keep a token from /auth if it is readable and issued for this registration."""
+    if read_auth_token(token, discord_id) is None:
+        return False
+    # auth_key was only used by the old signature check
+    update_config(auth_token=token, auth_key=None)
+    return True
+
 def authenticate(discord_id: str) -> bool:
-    """Authenticate with the server using discord ID."""
+    """Authenticate with the server using discord ID.
+    
+    Returns False only when the server says the user doesn't exist. Outages and
+    unexpected answers raise BackendError, so callers don't drop valid credentials.
+    """
+    start = time.perf_counter()
     try:
-        resp = requests.get(AUTH_URL, params={'discord_id': discord_id}, timeout=10)
-        print(f"/auth {resp.status_code}: {resp.text}")
-        
-        # If we get 404 with "User not found", it means the Discord ID is not registered
-        if resp.status_code == 404 and "User not found" in resp.text:
-            print("User not registered, return False")
-            return False
-            
-        return resp.status_code == 200
-    except Exception as e:
+        # token=1 asks the server for a token that lets later starts skip this request
+        resp = backend_request('GET', AUTH_PATH, params={'discord_id': discord_id, 'token': '1'})
+    except BackendError as e:
         print(f"Auth error: {e}")
+        record_metric('auth', result='network_error', error=type(e).__name__,
+                      ms=round((time.perf_counter() - start) * 1000, 1))
+        raise
+    
+    print(f"/auth {resp.status_code}: {resp.text}")
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+    
+    # If we get 404 with "User not found", it means the Discord ID is not registered
+    if resp.status_code == 404 and "User not found" in resp.text:
+        print("User not registered, return False")
+        record_metric('auth', result='not_found', status=resp.status_code, ms=elapsed_ms)
         return False
+    
+    record_metric('auth', result='ok' if resp.status_code == 200 else 'error',
+                  status=resp.status_code, ms=elapsed_ms)
+    if resp.status_code != 200:
+        raise BackendError(f"Unexpected /auth response: HTTP {resp.status_code}")
+    
+    # Servers that don't issue tokens answer in plain text, which is fine
+    try:
+        token = resp.json().get('token')
+    except (ValueError, AttributeError):
+        token = None
+    if token:
+        store_auth_token(discord_id, token)
+    return True
+
+def authenticate_stored(discord_id):
+    """Check stored credentials at startup, using the cached token when it is still valid.
+    
+    Returns True/False like authenticate(). A token close to expiry is accepted
+    and revalidated in the background.
+    """
+    config_data = load_config()
+    expires = read_auth_token(config_data.get('auth_token'), discord_id)
+    if expires is None:
+        return authenticate(discord_id)
+    
+    remaining = expires - time.time()
+    print(f"Using cached authentication (expires in {format_duration(remaining)})")
+    record_metric('auth', result='cached', remaining_s=round(remaining))
+    
+    if remaining < AUTH_TOKEN_REFRESH_WINDOW and runtime is not None:
+        runtime.run_blocking(revalidate_auth, discord_id, name='auth_revalidate')
+    return True
+
+def revalidate_auth(discord_id):
+    """Refresh the cached token in the background."""
+    try:
+        if not authenticate(discord_id):
+            print("Stored credentials are no longer registered")
+            delete_credentials()
+    except BackendError as e:
+        # Keep using the cached token until it actually expires
+        print(f"Background auth revalidation failed: {e}")
+
+# --------------------------
+# Action executor
+# --------------------------
+def notify(message, title="League of Leagues"):
+    """Show a tray notification, falling back to the console if the icon isn't up."""
+    print(f"[NOTIFY] {title}: {message}")
+    if app_icon is None:
+        return
+    try:
+        app_icon.notify(truncate_text(message, NOTIFY_MAX_MESSAGE), truncate_text(title, NOTIFY_MAX_TITLE))
+    except Exception as e:
+        print(f"Error showing notification: {e}")
+
+def truncate_text(text, limit):
+    """Cut text to at most limit characters, marking the cut with an ellipsis."""
+    text = str(text)
+    if len(text) <= limit:
+        return text
+    return text[:limit - 1] + "\u2026"
+
+def describe_error(error):
+    """Short, player-facing text for an exception; the full one belongs in the console log."""
+    if isinstance(error, requests.Timeout):
+        return "the server took too long to answer"
+    if isinstance(error, requests.ConnectionError):
+        return "could not connect"
+    if isinstance(error, requests.RequestException):
+        return "network error"
+    if isinstance(error, concurrent.futures.TimeoutError):
+        return "timed out"
+    # Our own errors carry short messages already, anything else is cut down
+    return truncate_text(str(error) or type(error).__name__, 120)
+
+class ActionExecutor:
+    """Runs the slow part of tray menu actions on the runtime worker pool.
+    
+    Menu callbacks hand work over and return straight away, so the tray stays
+    responsive. Only one run per action name is in flight at a time; repeated
+    clicks while it runs are coalesced into the one already running.
+    """
+    
+    def __init__(self):
+        self._running = {}  # action name -> Future, or None while the action is still prompting
+        self._lock = threading.Lock()
+    
+    def is_running(self, name):
+        with self._lock:
+            return name in self._running
+    
+    def begin(self, name, title):
+        """Hold name as in progress before an action prompts the player.
+        
+        Prompts run nested event loops, so the tray keeps handling clicks while
+        one is open. Returns False, after telling the player, if name is already
+        held or running. Pair with release().
+        """
+        with self._lock:
+            if name in self._running:
+                notify(f"{title} is already in progress.", title)
+                return False
+            self._running[name] = None
+            return True
+    
+    def release(self, name):
+        """Drop a hold from begin() that never turned into submitted work."""
+        with self._lock:
+            if name in self._running and self._running[name] is None:
+                del self._running[name]
+    
+    def submit(self, name, title, func, *args):
+        """Run func(*args) off the tray thread. Returns False if name is already running.
+        
+        A hold taken with begin() turns into the submitted run.
+        """
+        with self._lock:
+            if self._running.get(name) is not None:
+                notify(f"{title} is already in progress.", title)
+                return False
+            future = runtime.run_blocking(func, *args, name=name)
+            self._running[name] = future
+        
+        def finished(done):
+            with self._lock:
+                self._running.pop(name, None)
+            if done.cancelled():
+                return
+            error = done.exception()
+            if error is not None:
+                print(f"[ACTION] {name} failed: {error!r}")
+                notify(f"Failed: {describe_error(error)}", title)
+        
+        future.add_done_callback(finished)
+        return True
 
 # --------------------------
 # Menu action functions
 # --------------------------
 def register_action(icon, item):
+    clicked = time.perf_counter()
     print("Register action triggered")
+    
+    # Held from the click on, so clicking again while a prompt is open is coalesced
+    if not actions.begin('register', "Registration"):
+        return
+    try:
+        prompt_registration(clicked)
+    finally:
+        actions.release('register')
+
+def prompt_registration(clicked):
+    """Ask for the summoner and registration code, then submit the registration."""
     global summoner_name, summoner_tag, region
     
     # Check if client is ready
@@ -271,7 +1190,8 @@ def register_action(icon, item):
     if not summoner_name or not summoner_tag:
         # Ask if they want to manually enter summoner info
         if show_dialog("yesno", "Summoner Info", 
-                       "Could not automatically detect your summoner information. Would you like to enter it manually?"):
+                       "Could not automatically detect your summoner information. Would you like to enter it manually?",
+                       started=clicked):
             
             manual_info = ask_for_input(
                 "Enter Summoner Info", 
@@ -287,6 +1207,9 @@ def register_action(icon, item):
             summoner_tag = parts[1].strip()
         else:
             return
+        
+        # The click latency was measured on the first dialog
+        clicked = None
     
     # Display the summoner information we have
     display = f"{summoner_name}#{summoner_tag}"
@@ -296,31 +1219,48 @@ def register_action(icon, item):
     # Ask for the OTP code directly (removing the unnecessary informational dialog)
     otp = ask_for_input(
         "Enter Registration Code", 
-        f"Registering summoner: {display}\nEnter the registration code provided by the League of Leagues bot:"
+        f"Registering summoner: {display}\nEnter the registration code provided by the League of Leagues bot:",
+        started=clicked
     )
     
     if not otp:
         print("Registration cancelled.")
         return
-        
+    
+    # The server round trip runs off the tray thread, the result comes back as a notification
+    if actions.submit('register', "Registration", submit_registration, otp, display):
+        notify(f"Registering {display}...", "Registration")
+
+def submit_registration(otp, display):
+    """Send the registration code to the server and store the returned credentials."""
     try:
         # Make the API request
-        resp = requests.get(OTP_URL, params={'otp_pass': otp.strip(), 'summonersname': display}, timeout=10)
+        resp = backend_request('GET', OTP_PATH, params={'otp_pass': otp.strip(), 'summonersname': display})
         print(f"/otp {resp.status_code}: {resp.text}")
         
         if resp.status_code == 200 and resp.text.strip():
             save_config(resp.text.strip())
-            show_dialog("info", "Registered", "Successfully registered!")
+            notify("Successfully registered!", "Registered")
         else:
-            show_dialog("error", "Registration Failed", 
-                      "Invalid registration code or server error.")
+            notify("Invalid registration code or server error.", "Registration Failed")
     except Exception as e:
-        show_dialog("error", "Error", f"Registration failed: {str(e)}")
+        print(f"Registration failed: {e}")
+        notify(f"Registration failed: {describe_error(e)}", "Error")
 
 def join_game_action(icon, item):
+    clicked = time.perf_counter()
     print("Join game action triggered")
-    global summoner_name, summoner_tag, region
     
+    # Held from the click on, so clicking again while the prompt is open is coalesced
+    if not actions.begin('join', "Join Game"):
+        return
+    try:
+        prompt_join_game(clicked)
+    finally:
+        actions.release('join')
+
+def prompt_join_game(clicked):
+    """Ask for the match password, then submit the join."""
     # Check if client is ready
     if not is_ready or current_phase is None:
         show_dialog("error", "Error", "Client not ready or no phase info.")
@@ -329,19 +1269,27 @@ def join_game_action(icon, item):
     print(f"[DEBUG] current_phase = {current_phase}")
     
     # Ask for password
-    pwd = ask_for_input("Join Game", "Enter match password:")
+    pwd = ask_for_input("Join Game", "Enter match password:", started=clicked)
     
     if not pwd:
         print("Join game cancelled.")
         return
+    
+    if actions.submit('join', "Join Game", join_with_password, pwd):
+        notify("Looking up the match...", "Join Game")
 
+def join_with_password(pwd):
+    """Resolve a match password with the server and join the host's lobby."""
     try:
         # Make the API request to join match
-        resp = requests.get(JOINMATCH_URL, params={'password': pwd.strip()}, timeout=10)
+        start = time.perf_counter()
+        resp = backend_request('GET', JOINMATCH_PATH, params={'password': pwd.strip()})
         print(f"/joinmatch {resp.status_code}: {resp.text}")
+        record_metric('join_stage', stage='joinmatch', status=resp.status_code,
+                      ms=round((time.perf_counter() - start) * 1000, 1))
         
         if resp.status_code != 200 or not resp.text:
-            show_dialog("error", "Join Game", "Failed to join: Invalid response from server")
+            notify("Failed to join: Invalid response from server", "Join Game")
             return
 
         # Parse the response (format: "summonerName#TAG,REGIONpin")
@@ -349,85 +1297,79 @@ def join_game_action(icon, item):
         summoner_info, pin = response_data.split(',', 1)
         summoner_name_from_server, tag = summoner_info.split('#', 1)
         
-        # Schedule the lobby join on the main thread through Tkinter's after method
-        def schedule_join():
-            global connector, root
-            if connector and root:
-                print("Scheduling join lobby operation")
-                root.after(100, lambda: join_lobby(summoner_name_from_server, tag, pin))
-            else:
-                show_dialog("error", "Join Game", "Connector or UI not ready")
-        
-        # Make sure this runs on the main thread
-        root.after(0, schedule_join)
+        # Wait for the lobby join so a second click stays coalesced until it's done
+        future = join_lobby(summoner_name_from_server, tag, pin)
+        if future is not None:
+            future.result(timeout=60)
         
     except Exception as e:
-        show_dialog("error", "Join Game", f"Error: {str(e)}")
+        print(f"Join failed: {e}")
+        notify(f"Error: {describe_error(e)}", "Join Game")
+
+async def do_join_lobby(connection, summoner, tag, pin):
+    """Find the custom lobby owned by summoner#tag and join it.
+    
+    Returns a (success, message) tuple so callers decide how to report the result.
+    """
+    # Get current custom games
+    start = time.perf_counter()
+    games_resp = await connection.request('GET', '/lol-lobby/v2/lobby/custom/available')
+    games = await read_lcu_json(games_resp) or []
+    list_done = time.perf_counter()
+    record_metric('join_stage', stage='lobby_list', lobbies=len(games),
+                  ms=round((list_done - start) * 1000, 1))
+    
+    # Find matching lobby (exact owner name first, then partial match)
+    match = find_lobby(games, summoner, tag)
+    
+    match_done = time.perf_counter()
+    record_metric('join_stage', stage='lobby_match', found=match is not None,
+                  ms=round((match_done - list_done) * 1000, 1))
+    
+    if not match:
+        return False, f"Couldn't find {summoner}#{tag}'s lobby"
+    
+    # Join the lobby
+    game_id = match.id
+    endpoint = f'/lol-lobby/v2/lobby/custom/{game_id}/join'
+    body = {'asSpectator': False, 'password': pin}
+    
+    join_resp = await connection.request('POST', endpoint, json=body)
+    record_metric('join_stage', stage='lobby_join', status=join_resp.status,
+                  ms=round((time.perf_counter() - match_done) * 1000, 1))
+    
+    if join_resp.status == 200:
+        return True, f"Successfully joined {summoner}#{tag}'s lobby!"
+    
+    try:
+        error_text = (await read_lcu_json(join_resp)).get('message', 'Unknown error')
+    except Exception:
+        error_text = 'Unknown error'
+    return False, f"Failed to join: {error_text}"
 
-# Function that will be called through Tkinter's event loop (main thread)
+# Start the lobby join on the runtime loop, returns its future
 def join_lobby(summoner, tag, pin):
-    global connector, root
+    global connector
     
     print(f"Attempting to join lobby of {summoner}#{tag} with pin {pin}")
     
+    connection = connector.connection if connector else None
+    if connection is None:
+        notify("League client is not connected", "Join Game")
+        return None
+    
     # Create a coroutine for the lobby join
-    async def do_join_lobby():
+    async def run_join():
         try:
-            # Get current custom games
-            games_resp = await connector.request('GET', '/lol-lobby/v2/lobby/custom/available')
-            games = await games_resp.json()
-            
-            # Find matching lobby
-            match = None
-            target_full = f"{summoner} #{tag}"
-            
-            # First try exact match
-            match = next(
-                (g for g in games if g.get('ownerDisplayName', '').lower() == target_full.lower()), 
-                None
-            )
-            
-            # If no exact match, try partial match
-            if not match:
-                match = next(
-                    (g for g in games if g.get('ownerDisplayName', '').lower().startswith(
-                        summoner.lower() + '#')
-                    ), 
-                    None
-                )
-            
-            if not match:
-                # Show error on the main thread
-                root.after(0, lambda: show_dialog("error", "Join Game", 
-                                               f"Couldn't find {summoner}#{tag}'s lobby"))
-                return
-            
-            # Join the lobby
-            game_id = match['id']
-            endpoint = f'/lol-lobby/v2/lobby/custom/{game_id}/join'
-            body = {'asSpectator': False, 'password': pin}
-            
-            join_resp = await connector.request('POST', endpoint, json=body)
-            
-            if join_resp.status == 200:
-                # Show success on the main thread
-                root.after(0, lambda: show_dialog("info", "Join Game", 
-                                               f"Successfully joined {summoner}#{tag}'s lobby!"))
-            else:
-                error_msg = await join_resp.json()
-                error_text = error_msg.get('message', 'Unknown error')
-                # Show error on the main thread
-                root.after(0, lambda: show_dialog("error", "Join Game", 
-                                               f"Failed to join: {error_text}"))
+            success, message = await do_join_lobby(connection, summoner, tag, pin)
+            notify(message, "Join Game")
         except Exception as e:
             print(f"Error in join_lobby: {e}")
             traceback.print_exc()
-            # Show error on the main thread
-            root.after(0, lambda: show_dialog("error", "Join Game", 
-                                           f"Error during join process: {str(e)}"))
+            notify(f"Error during join process: {describe_error(e)}", "Join Game")
     
-    # Schedule the coroutine to run in the connector's event loop
-    connector._connection._loop.create_task(do_join_lobby())
+    # Schedule the coroutine on the runtime loop the connection lives on
+    return runtime.submit(run_join(), name='join_lobby')
 
 def check_status_action(icon, item):
     print("Check status action triggered")
@@ -437,13 +1379,18 @@ def check_status_action(icon, item):
     config_data = load_config()
     registered_id = config_data.get('discord_id') if isinstance(config_data, dict) else config_data
     
-    status_msg = "Status:\n\n"
-    status_msg += f"Client Connected: {'Yes' if is_ready else 'No'}\n"
+    status_msg = f"Client Connected: {'Yes' if is_ready else 'No'}\n"
     status_msg += f"Summoner: {summoner_name}#{summoner_tag if summoner_name and summoner_tag else 'Not detected'}\n"
     status_msg += f"Region: {region if region else 'Unknown'}\n"
     status_msg += f"Registered: {'Yes' if registered_id else 'No'}\n"
+    status_msg += f"Server: {backend_endpoints.status_text()}\n"
+    
+    # Time spent per gameflow phase this session (notifications are short, keep the top few)
+    if phase_timeline and len(phase_timeline):
+        top_phases = phase_timeline.summary().splitlines()[:3]
+        status_msg += "Phase times: " + ", ".join(top_phases) + "\n"
     
-    show_dialog("info", "League of Leagues Status", status_msg)
+    notify(status_msg.strip(), "League of Leagues Status")
 
 def check_client_version(icon=None, item=None):
     """Check for updates and provide a link to download if newer version available."""
@@ -452,7 +1399,7 @@ def check_client_version(icon=None, item=None):
     # Use a direct, simple approach for the update check
     def do_version_check():
         try:
-            resp = requests.get(VERSION_URL, timeout=10)
+            resp = backend_request('GET', VERSION_PATH)
             print(f"Version check response: {resp.status_code}")
             
             if resp.status_code == 200:
@@ -461,17 +1408,17 @@ def check_client_version(icon=None, item=None):
                 print(f"Server version: {version}")
                 
                 # Create a simpler dialog directly
-                create_update_dialog(version, DOWNLOAD_URL)
+                create_update_dialog(version, backend_url(DOWNLOAD_PATH))
             else:
                 print(f"Version check error: {resp.status_code}")
-                messagebox.showerror("Update Check", f"Failed to check for updates. Server returned error: {resp.status_code}")
+                notify(f"Failed to check for updates. Server returned error: {resp.status_code}", "Update Check")
         except Exception as e:
             print(f"Version check failed: {e}")
             traceback.print_exc()
-            messagebox.showerror("Update Check", f"Failed to check for updates: {str(e)}")
+            notify(f"Failed to check for updates: {describe_error(e)}", "Update Check")
     
-    # Schedule the check on the main thread
-    threading.Thread(target=do_version_check).start()
+    # Run the check on the worker pool so the tray isn't blocked
+    actions.submit('check_version', "Update Check", do_version_check)
 
 def create_update_dialog(version, download_url):
     """Create a simpler update dialog with direct Tkinter calls."""
@@ -626,6 +1573,20 @@ def quit_application(icon, item):
         if icon:
             icon.stop()
         
+        # Cancel in-flight work and stop the runtime loop
+        if runtime:
+            runtime.shutdown()
+        
+        record_phase('Disconnected')
+        save_phase_timeline()
+        
+        if traffic_recorder is not None:
+            traffic_recorder.close()
+        
+        # Last chance to deliver buffered telemetry, with a short timeout
+        if telemetry is not None:
+            telemetry.flush_now()
+        
         # Give a moment for icon to stop
         time.sleep(0.2)
         
@@ -636,6 +1597,358 @@ def quit_application(icon, item):
         # Force exit anyway
         os._exit(1)
 
+# --------------------------
+# Single instance handling
+# --------------------------
+def acquire_instance_lock():
+    """Take the per-user instance lock. Returns False if another instance holds it."""
+    global instance_lock_file
+    
+    try:
+        lock_file = open(INSTANCE_LOCK_PATH, 'a+')
+    except OSError as e:
+        # If we can't even open the lock file, don't block startup over it
+        print(f"Could not open instance lock: {e}")
+        return True
+    
+    try:
+        if sys.platform == 'win32':
+            import msvcrt
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    
+    # The OS releases the lock when the process exits, even on os._exit
+    instance_lock_file = lock_file
+    return True
+
+def forward_to_running_instance(command, wait_seconds=2.0):
+    """Send a command to the running instance. Returns True if it was delivered."""
+    deadline = time.monotonic() + wait_seconds
+    
+    while True:
+        try:
+            # The running instance may still be starting up and not have written its port yet
+            with open(INSTANCE_PORT_PATH) as f:
+                port_str, token = f.read().split()
+            
+            with socket.create_connection(('127.0.0.1', int(port_str)), timeout=1) as sock:
+                payload = dict(command, token=token)
+                sock.sendall(json.dumps(payload).encode('utf-8') + b'\n')
+                reply = sock.makefile('rb').readline().strip()
+            return reply == b'ok'
+        except (OSError, ValueError) as e:
+            if time.monotonic() >= deadline:
+                print(f"Could not reach running instance: {e}")
+                return False
+            time.sleep(0.05)
+
+async def start_command_server(dispatch):
+    """Listen on localhost for commands forwarded by later launches."""
+    # Other local users can reach the port, so require the token only we can read from AppData
+    token = secrets.token_hex(16)
+    
+    async def handle_client(reader, writer):
+        try:
+            line = await asyncio.wait_for(reader.readline(), timeout=2)
+            command = json.loads(line.decode('utf-8'))
+            if not hmac.compare_digest(str(command.pop('token', '')), token):
+                writer.write(b'denied\n')
+                return
+            # Answer first so the forwarding process can exit straight away
+            writer.write(b'ok\n')
+            await writer.drain()
+            runtime.run_blocking(dispatch, command, name='forwarded_command')
+        except Exception as e:
+            print(f"Error handling forwarded command: {e}")
+        finally:
+            writer.close()
+    
+    server = await asyncio.start_server(handle_client, '127.0.0.1', 0, limit=64 * 1024)
+    port = server.sockets[0].getsockname()[1]
+    with open(INSTANCE_PORT_PATH, 'w') as f:
+        f.write(f"{port} {token}")
+    
+    print(f"Listening for forwarded commands on port {port}")
+    return server
+
+def command_from_args(args):
+    """Build the command a second launch forwards to the running instance."""
+    if args.join:
+        return {'command': 'join', 'password': args.join}
+    if args.export_timeline:
+        return {'command': 'export_timeline'}
+    return {'command': 'activate'}
+
+def handle_forwarded_command(command):
+    """Run a command forwarded from another launch of the application."""
+    name = command.get('command')
+    print(f"Forwarded command received: {name}")
+    
+    if name == 'join' and command.get('password'):
+        if not is_ready or current_phase is None:
+            notify("Client not ready or no phase info.", "Join Game")
+            return
+        actions.submit('join', "Join Game", join_with_password, str(command['password']))
+    elif name == 'export_timeline':
+        path = export_phase_timeline()
+        notify(f"Phase timeline saved to {os.path.basename(path)} in the League of Leagues folder.")
+    elif name == 'activate':
+        notify("League of Leagues is already running.")
+    else:
+        print(f"Unknown forwarded command: {command}")
+
+# --------------------------
+# Diagnostics
+# --------------------------
+class SamplingProfiler:
+    """Samples the stacks of every thread from a background thread.
+    
+    Nothing is installed in the interpreter: while the profiler is stopped
+    there is no sampling thread and no hook, so it costs nothing. While it
+    runs it wakes every PROFILER_INTERVAL, reads sys._current_frames() and
+    counts identical stacks per thread.
+    
+    on_timeout is called from the sampling thread when a run hits max_seconds.
+    """
+    
+    def __init__(self, interval=PROFILER_INTERVAL, max_seconds=PROFILER_MAX_SECONDS, on_timeout=None):
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.on_timeout = on_timeout
+        self.samples = Counter()  # (thread name, stack root first) -> count
+        self.sample_count = 0
+        self.started_at = None
+        self.elapsed = 0.0
+        self.saved = False  # Whether a diagnostics bundle holds the finished run
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()  # Guards samples against readers while sampling
+    
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self):
+        if self.running:
+            return False
+        self._stop.clear()
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, daemon=True, name='lol-profiler')
+        self._thread.start()
+        return True
+    
+    def stop(self):
+        if not self.running:
+            return False
+        self._stop.set()
+        self._thread.join(1)
+        return True
+    
+    def _run(self):
+        own_id = threading.get_ident()
+        start = time.perf_counter()
+        deadline = start + self.max_seconds
+        
+        timed_out = False
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            stacks = [(names.get(thread_id, str(thread_id)), self._stack(frame))
+                      for thread_id, frame in sys._current_frames().items() if thread_id != own_id]
+            frame = None  # Don't keep the last sampled frame alive between samples
+            
+            with self._lock:
+                for key in stacks:
+                    self.samples[key] += 1
+                self.sample_count += 1
+                self.elapsed = time.perf_counter() - start
+            
+            if time.perf_counter() >= deadline:
+                print(f"[PROFILER] Stopped after {self.max_seconds}s")
+                timed_out = True
+                break
+        
+        with self._lock:
+            self.elapsed = time.perf_counter() - start
+        if timed_out and self.on_timeout is not None:
+            self.on_timeout()
+    
+    @staticmethod
+    def _stack(frame):
+        stack = []
+        while frame is not None and len(stack) < PROFILER_MAX_DEPTH:
+            code = frame.f_code
+            stack.append((os.path.basename(code.co_filename), code.co_name, frame.f_lineno))
+            frame = frame.f_back
+        stack.reverse()
+        return tuple(stack)
+    
+    def snapshot(self):
+        """Return (samples, sample count, elapsed seconds), safe to read while sampling."""
+        with self._lock:
+            return dict(self.samples), self.sample_count, self.elapsed
+    
+    def report(self, top=25):
+        """Per-thread sample counts plus the functions seen most, by self and total time."""
+        samples, sample_count, elapsed = self.snapshot()
+        if not sample_count:
+            return "No samples collected.\n"
+        
+        threads = Counter()
+        own = Counter()
+        total = Counter()
+        for (thread_name, stack), count in samples.items():
+            threads[thread_name] += count
+            if stack:
+                filename, func, line = stack[-1]
+                own[f"{func} ({filename}:{line})"] += count
+            # Count each function once per stack so recursion isn't counted twice
+            for function in {f"{func} ({filename})" for filename, func, _ in stack}:
+                total[function] += count
+        
+        # Percentages are of all stacks sampled, across every thread
+        stacks = sum(threads.values())
+        lines = [f"{sample_count} samples over {elapsed:.1f}s "
+                 f"every {self.interval * 1000:.0f} ms", "", "Samples per thread:"]
+        lines += [f"  {count:8d}  {name}" for name, count in threads.most_common()]
+        lines += ["", "Top lines (self):"]
+        lines += [f"  {count * 100 / stacks:6.1f}%  {name}" for name, count in own.most_common(top)]
+        lines += ["", "Top functions (total):"]
+        lines += [f"  {count * 100 / stacks:6.1f}%  {name}" for name, count in total.most_common(top)]
+        return "\n".join(lines) + "\n"
+    
+    def collapsed(self):
+        """Samples in collapsed-stack format ("thread;frame;frame count"), as read by flame graph tools."""
+        samples, _, _ = self.snapshot()
+        lines = []
+        for (thread_name, stack), count in samples.items():
+            frames = [thread_name] + [f"{func} ({filename}:{line})" for filename, func, line in stack]
+            lines.append(f"{';'.join(frames)} {count}")
+        return "\n".join(lines) + "\n"
+
+def dump_thread_stacks():
+    """Return the current stack of every thread as text."""
+    names = {t.ident: t for t in threading.enumerate()}
+    parts = []
+    for thread_id, frame in sys._current_frames().items():
+        thread = names.get(thread_id)
+        label = thread.name if thread else str(thread_id)
+        daemon = " (daemon)" if thread and thread.daemon else ""
+        parts.append(f"Thread {label} [{thread_id}]{daemon}:\n" + "".join(traceback.format_stack(frame)))
+    return "\n".join(parts)
+
+async def collect_task_stacks():
+    """Format every asyncio task on the running loop with its stack."""
+    out = io.StringIO()
+    tasks = asyncio.all_tasks()
+    out.write(f"{len(tasks)} tasks\n\n")
+    for task in tasks:
+        task.print_stack(file=out)
+        out.write("\n")
+    return out.getvalue()
+
+def dump_task_stacks(timeout=5):
+    """Return the stacks of the asyncio tasks on the runtime loop as text."""
+    if runtime is None or not runtime.loop.is_running():
+        return "Runtime loop is not running.\n"
+    try:
+        return runtime.submit(collect_task_stacks(), name='dump_task_stacks').result(timeout)
+    except Exception as e:
+        # A loop that doesn't answer is worth knowing about too
+        return f"Could not collect task stacks: {e!r}\n"
+
+def runtime_summary():
+    """Short text description of the client state for the diagnostics bundle."""
+    lines = [
+        f"Client version: {CLIENT_VERSION}",
+        f"Python: {sys.version.split()[0]} on {sys.platform}",
+        f"Memory (RSS): {format_bytes(get_rss_bytes())}",
+        f"Low-memory mode: {low_memory_mode}",
+        f"League client ready: {is_ready}, phase: {current_phase}",
+        f"Server: {backend_endpoints.status_text()}",
+    ]
+    if runtime is not None:
+        lines.append("In-flight operations:")
+        lines += [f"  {name}: {seconds:.1f}s" for name, seconds in runtime.in_flight()] or ["  none"]
+    if phase_timeline and len(phase_timeline):
+        lines += ["Phase times:", phase_timeline.summary()]
+    return "\n".join(lines) + "\n"
+
+def write_diagnostics_bundle():
+    """Write stacks, runtime state and any profile to a timestamped zip in AppData."""
+    path = get_app_data_path(time.strftime('diagnostics-%Y%m%d-%H%M%S.zip'))
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as bundle:
+        bundle.writestr('summary.txt', runtime_summary())
+        bundle.writestr('threads.txt', dump_thread_stacks())
+        bundle.writestr('asyncio_tasks.txt', dump_task_stacks())
+        if profiler is not None and profiler.sample_count:
+            finished = not profiler.running
+            bundle.writestr('profile.txt', profiler.report())
+            bundle.writestr('profile.folded', profiler.collapsed())
+            if finished:
+                profiler.saved = True
+    print(f"[DIAGNOSTICS] Wrote {path}")
+    return path
+
+def profiler_running(item=None):
+    return profiler is not None and profiler.running
+
+def profiler_timed_out():
+    """Save the bundle of a run that stopped itself, called from the sampling thread."""
+    if actions.submit('diagnostics', "Diagnostics", save_diagnostics_bundle):
+        notify(f"Profiler stopped after {PROFILER_MAX_SECONDS // 60} minutes, saving diagnostics...", "Diagnostics")
+
+def toggle_profiler_action(icon, item):
+    """Start the sampling profiler, or stop it and save a diagnostics bundle."""
+    global profiler
+    
+    if profiler_running():
+        profiler.stop()
+        print(profiler.report())
+        if actions.submit('diagnostics', "Diagnostics", save_diagnostics_bundle):
+            notify("Profiler stopped, saving diagnostics...", "Diagnostics")
+        return
+    
+    # A run that stopped itself but never made it into a bundle is saved, not replaced
+    if profiler is not None and profiler.sample_count and not profiler.saved:
+        if actions.submit('diagnostics', "Diagnostics", save_diagnostics_bundle):
+            notify("Profiler had already stopped, saving its diagnostics...", "Diagnostics")
+        return
+    
+    profiler = SamplingProfiler(on_timeout=profiler_timed_out)
+    profiler.start()
+    notify(f"Profiler started. It stops by itself after {PROFILER_MAX_SECONDS // 60} minutes.", "Diagnostics")
+
+def write_stack_dump():
+    """Write thread and asyncio task stacks to a timestamped text file in AppData."""
+    path = get_app_data_path(time.strftime('stacks-%Y%m%d-%H%M%S.txt'))
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("== Threads ==\n\n")
+        f.write(dump_thread_stacks())
+        f.write("\n== asyncio tasks ==\n\n")
+        f.write(dump_task_stacks())
+    print(f"[DIAGNOSTICS] Wrote {path}")
+    return path
+
+def dump_stacks_action(icon, item):
+    """Save thread and asyncio task stacks to a file; shipped builds have no console."""
+    def dump():
+        path = write_stack_dump()
+        notify(f"Stacks saved to {os.path.basename(path)} in the League of Leagues folder.", "Diagnostics")
+    actions.submit('dump_stacks', "Diagnostics", dump)
+
+def save_diagnostics_action(icon, item):
+    actions.submit('diagnostics', "Diagnostics", save_diagnostics_bundle)
+
+def save_diagnostics_bundle():
+    path = write_diagnostics_bundle()
+    notify(f"Diagnostics saved to {os.path.basename(path)} in the League of Leagues folder.", "Diagnostics")
+
 # --------------------------
 # System tray setup
 # --------------------------
@@ -650,6 +1963,11 @@ def create_tray_icon():
             pystray.MenuItem('Join Game', join_game_action),
             pystray.MenuItem('Check Status', check_status_action),
             pystray.MenuItem('Check for Updates', check_client_version),
+            pystray.MenuItem('Diagnostics', pystray.Menu(
+                pystray.MenuItem('Sampling Profiler', toggle_profiler_action, checked=profiler_running),
+                pystray.MenuItem('Dump Stacks', dump_stacks_action),
+                pystray.MenuItem('Save Diagnostics Bundle', save_diagnostics_action)
+            )),
             pystray.MenuItem('Quit', quit_application)
         )
         
@@ -659,6 +1977,23 @@ def create_tray_icon():
         traceback.print_exc()
         return None
 
+# Pillow plugin per icon file type. Opening a format that Pillow doesn't preload
+# (like .ico) otherwise makes older Pillow releases import every plugin they ship
+ICON_FORMATS = {
+    '.ico': ('ICO', 'IcoImagePlugin'),
+    '.png': ('PNG', 'PngImagePlugin'),
+    '.icns': ('ICNS', 'IcnsImagePlugin'),
+}
+
+def open_icon_image(path):
+    """Open an icon file with only the Pillow plugin its extension needs."""
+    icon_format = ICON_FORMATS.get(os.path.splitext(path)[1].lower())
+    if icon_format is None:
+        return Image.open(path)
+    format_name, plugin = icon_format
+    importlib.import_module(f"PIL.{plugin}")
+    return Image.open(path, formats=[format_name])
+
 def create_tray_image():
     """Create an image for the system tray icon using the same icon as the executable.
     Works on both Windows and macOS."""
@@ -723,10 +2058,10 @@ def create_tray_image():
             if os.path.exists(icon_path):
                 print(f"Found icon at: {icon_path}")
                 try:
-                    img = Image.open(icon_path)
-                    # Convert to RGBA if it's not already
-                    if img.mode != 'RGBA':
-                        img = img.convert('RGBA')
+                    # Close the source file once we have our own copy of the pixels
+                    with open_icon_image(icon_path) as src:
+                        # Convert to RGBA if it's not already
+                        img = src.convert('RGBA') if src.mode != 'RGBA' else src.copy()
                     # Ensure it's the right size for system tray (64x64)
                     if img.size != (64, 64):
                         # Use LANCZOS for high-quality resizing
@@ -745,6 +2080,9 @@ def create_tray_image():
         
     except Exception as e:
         print(f"Using fallback icon: {e}")
+        # Drawing helpers are only needed here, so don't pay for them on the normal path
+        from PIL import ImageDraw, ImageFont
+        
         # Create a fallback icon that works on both platforms
         img = Image.new('RGBA', (64, 64), (0, 0, 0, 0))  # Transparent background
         dc = ImageDraw.Draw(img)
@@ -795,6 +2133,525 @@ def create_tray_image():
         return img
 
 
+# --------------------------
+# Gameflow phase timeline
+# --------------------------
+# Known gameflow phases get stable one-byte codes; unknown ones are appended at runtime
+GAMEFLOW_PHASES = (
+    'Disconnected', 'None', 'Lobby', 'Matchmaking', 'CheckedIntoTournament', 'ReadyCheck',
+    'ChampSelect', 'GameStart', 'FailedToLaunch', 'InProgress', 'Reconnect',
+    'WaitingForStats', 'PreEndOfGame', 'EndOfGame', 'TerminatedInError',
+)
+
+class PhaseTimeline:
+    """Fixed-size ring buffer of gameflow phase transitions.
+    
+    Each entry is a monotonic timestamp in an array('d') plus a phase code in an
+    array('B'), so memory stays at 9 bytes per slot regardless of uptime.
+    """
+    
+    FILE_MAGIC = b'LOLPT1'
+    
+    # Marker entry for the end of an earlier session; time until the next entry isn't counted
+    SESSION_BOUNDARY = 'SessionBoundary'
+    
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self._times = array('d', [0.0]) * capacity
+        self._codes = array('B', [0]) * capacity
+        self._start = 0
+        self._count = 0
+        self._names = list(GAMEFLOW_PHASES)
+        self._lock = threading.Lock()
+    
+    def __len__(self):
+        return self._count
+    
+    def _code_for(self, phase):
+        name = 'None' if phase is None else str(phase)
+        try:
+            return self._names.index(name)
+        except ValueError:
+            if len(self._names) >= 256:
+                # Out of codes, file the phase under the generic "None"
+                return self._names.index('None')
+            self._names.append(name)
+            return len(self._names) - 1
+    
+    def record(self, phase, timestamp=None):
+        """Record a transition to phase. Repeats of the current phase are ignored."""
+        if timestamp is None:
+            timestamp = time.monotonic()
+        
+        with self._lock:
+            code = self._code_for(phase)
+            if self._count:
+                last = (self._start + self._count - 1) % self.capacity
+                if self._codes[last] == code:
+                    return False
+            
+            if self._count < self.capacity:
+                index = (self._start + self._count) % self.capacity
+                self._count += 1
+            else:
+                # Full: overwrite the oldest entry
+                index = self._start
+                self._start = (self._start + 1) % self.capacity
+            
+            self._times[index] = timestamp
+            self._codes[index] = code
+            return True
+    
+    def entries(self):
+        """Return the recorded (monotonic timestamp, phase) pairs, oldest first."""
+        with self._lock:
+            indexes = [(self._start + i) % self.capacity for i in range(self._count)]
+            return [(self._times[i], self._names[self._codes[i]]) for i in indexes]
+    
+    def durations(self, now=None):
+        """Return total seconds spent in each phase. The current phase counts up to now."""
+        if now is None:
+            now = time.monotonic()
+        
+        entries = self.entries()
+        totals = {}
+        for (started, phase), (ended, _) in zip(entries, entries[1:] + [(now, None)]):
+            if phase == self.SESSION_BOUNDARY:
+                continue
+            totals[phase] = totals.get(phase, 0.0) + max(0.0, ended - started)
+        return totals
+    
+    def summary(self, now=None):
+        """Format per-phase durations, longest first."""
+        totals = sorted(self.durations(now).items(), key=lambda item: item[1], reverse=True)
+        return "\n".join(f"{phase}: {format_duration(seconds)}" for phase, seconds in totals)
+    
+    def export(self):
+        """Return the timeline as JSON-friendly data with wall-clock timestamps."""
+        wall_offset = time.time() - time.monotonic()
+        return {
+            'entries': [
+                {'time': round(ts + wall_offset, 3), 'phase': phase}
+                for ts, phase in self.entries()
+            ],
+            'durations': {phase: round(seconds, 3) for phase, seconds in self.durations().items()},
+        }
+    
+    def export_json(self, path):
+        """Write the exported timeline to a JSON file."""
+        with open(path, 'w') as f:
+            json.dump(self.export(), f, indent=2)
+        return path
+    
+    def save(self, path):
+        """Persist the timeline in a compact binary format.
+        
+        Layout: magic, phase-name table, entry count, then wall-clock doubles and phase codes.
+        """
+        wall_offset = time.time() - time.monotonic()
+        with self._lock:
+            indexes = [(self._start + i) % self.capacity for i in range(self._count)]
+            times = array('d', (self._times[i] + wall_offset for i in indexes))
+            codes = array('B', (self._codes[i] for i in indexes))
+            names = list(self._names)
+        
+        parts = [self.FILE_MAGIC, struct.pack('<B', len(names) - 1)]
+        for name in names:
+            encoded = name.encode('utf-8')[:255]
+            parts.append(struct.pack('<B', len(encoded)) + encoded)
+        if sys.byteorder != 'little':
+            times.byteswap()
+        parts += [struct.pack('<I', len(codes)), times.tobytes(), codes.tobytes()]
+        
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(b''.join(parts))
+        os.replace(tmp_path, path)
+    
+    def load(self, path):
+        """Load a timeline written by save(), keeping the newest entries that fit.
+        
+        The stored session ends at the time the file was saved, so the time the
+        app wasn't running doesn't count toward the last stored phase.
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        if not data.startswith(self.FILE_MAGIC):
+            raise ValueError("Not a phase timeline file")
+        
+        offset = len(self.FILE_MAGIC)
+        name_count = data[offset] + 1
+        offset += 1
+        names = []
+        for _ in range(name_count):
+            length = data[offset]
+            names.append(data[offset + 1:offset + 1 + length].decode('utf-8'))
+            offset += 1 + length
+        (count,) = struct.unpack_from('<I', data, offset)
+        offset += 4
+        
+        times = array('d')
+        times.frombytes(data[offset:offset + 8 * count])
+        if sys.byteorder != 'little':
+            times.byteswap()
+        codes = array('B', data[offset + 8 * count:offset + 9 * count])
+        if len(codes) != count:
+            raise ValueError("Truncated phase timeline file")
+        
+        # Stored times are wall-clock, convert them back onto this session's monotonic clock
+        wall_offset = time.time() - time.monotonic()
+        for ts, code in zip(times[-self.capacity:], codes[-self.capacity:]):
+            self.record(names[code], ts - wall_offset)
+        
+        if count:
+            saved_at = max(times[-1], os.path.getmtime(path))
+            self.record(self.SESSION_BOUNDARY, saved_at - wall_offset)
+        return count
+
+def format_duration(seconds):
+    """Format seconds as e.g. 1h 02m 05s."""
+    seconds = int(round(seconds))
+    hours, remainder = divmod(seconds, 3600)
+    minutes, secs = divmod(remainder, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m {secs:02d}s"
+    if minutes:
+        return f"{minutes}m {secs:02d}s"
+    return f"{secs}s"
+
+def record_phase(phase):
+    """Add a gameflow phase transition to the timeline, if one is being kept."""
+    if phase_timeline is not None:
+        phase_timeline.record(phase)
+
+def save_phase_timeline():
+    """Persist the timeline when the player has opted in."""
+    if phase_timeline is None or not load_config().get('persist_timeline'):
+        return
+    try:
+        phase_timeline.save(PHASE_TIMELINE_PATH)
+    except Exception as e:
+        print(f"Error saving phase timeline: {e}")
+
+def export_phase_timeline():
+    """Write the timeline to JSON in the AppData directory and return the path."""
+    path = phase_timeline.export_json(PHASE_TIMELINE_EXPORT_PATH)
+    print(f"Exported phase timeline to {path}")
+    return path
+
+# --------------------------
+# LCU payload models
+# --------------------------
+# orjson when installed, the standard library otherwise
+json_loads = orjson.loads if orjson is not None else json.loads
+
+async def read_lcu_json(resp):
+    """Decode an LCU response body with the fastest available JSON backend."""
+    return json_loads(await resp.read())
+
+class LobbyEntry:
+    """The fields of a custom lobby list entry that joining needs."""
+    
+    __slots__ = ('id', 'owner_display_name')
+    
+    def __init__(self, id, owner_display_name):
+        self.id = id
+        self.owner_display_name = owner_display_name
+    
+    @classmethod
+    def from_payload(cls, data):
+        return cls(data.get('id'), data.get('ownerDisplayName') or '')
+
+class Summoner:
+    """Riot ID of the logged-in summoner."""
+    
+    __slots__ = ('game_name', 'tag_line')
+    
+    def __init__(self, game_name, tag_line):
+        self.game_name = game_name
+        self.tag_line = tag_line
+    
+    @classmethod
+    def from_payload(cls, data):
+        data = data or {}
+        return cls(data.get('gameName'), data.get('tagLine'))
+
+class RegionLocale:
+    """Region of the League client, upper-cased as the backend expects it."""
+    
+    __slots__ = ('region',)
+    
+    def __init__(self, region):
+        self.region = region
+    
+    @classmethod
+    def from_payload(cls, data):
+        return cls((data or {}).get('region', '').upper())
+
+def find_lobby(lobbies, summoner, tag):
+    """Return the lobby owned by summoner#tag, falling back to the first lobby owned by summoner.
+    
+    Searches the decoded list entries directly and builds a LobbyEntry only for the
+    match, since the rest of the list is thrown away right after.
+    """
+    target_key = f"{summoner} #{tag}".lower()
+    prefix = summoner.lower() + '#'
+    
+    # One pass: an exact match wins, otherwise keep the first prefix match
+    fallback = None
+    for lobby in lobbies:
+        owner_key = (lobby.get('ownerDisplayName') or '').lower()
+        if owner_key == target_key:
+            return LobbyEntry.from_payload(lobby)
+        if fallback is None and owner_key.startswith(prefix):
+            fallback = lobby
+    return LobbyEntry.from_payload(fallback) if fallback is not None else None
+
+def run_lobby_decode_benchmark(lobby_count=20000, repeat=5):
+    """Compare building a model per lobby with searching the decoded dicts, under each JSON backend.
+    
+    Every combination is measured so the effect of the search and of the JSON
+    backend can be told apart. Retained memory is what the join keeps afterwards.
+    """
+    lobbies = SyntheticLobbyConnection(lobby_count, 'Target', 'TAG').lobbies
+    raw = json.dumps(lobbies).encode('utf-8')
+    
+    backends = [('stdlib json', json.loads)]
+    if orjson is not None:
+        backends.append(('orjson', orjson.loads))
+    print(f"Lobby list decode: {lobby_count} lobbies, {len(raw) / 1024:.0f} KB of JSON"
+          f"{'' if orjson is not None else ' (orjson not installed)'}")
+    
+    def decode_models(loads):
+        # A model per entry, searched afterwards
+        games = [LobbyEntry.from_payload(entry) for entry in loads(raw)]
+        target_key = "target #tag"
+        return next((g for g in games if g.owner_display_name.lower() == target_key), None)
+    
+    def decode_dicts(loads):
+        return find_lobby(loads(raw), 'Target', 'TAG')
+    
+    cases = []
+    for backend_name, loads in backends:
+        cases.append((f"model per lobby + {backend_name}", partial(decode_models, loads)))
+        cases.append((f"search dicts + {backend_name}", partial(decode_dicts, loads)))
+    
+    for label, decode in cases:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            decode()
+            timings.append(time.perf_counter() - start)
+        
+        gc.collect()
+        tracemalloc.start()
+        result = decode()
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del result
+        
+        print(f"  {label}: best {min(timings) * 1000:.1f} ms, "
+              f"retained {format_bytes(retained)}, peak {format_bytes(peak)}")
+    return 0
+
+# --------------------------
+# LCU traffic record and replay
+# --------------------------
+class TrafficRecorder:
+    """Writes LCU websocket events and REST exchanges to a gzip JSON-lines file.
+    
+    The first line is a header; every other line is a compact array starting with
+    seconds since recording began and the record kind:
+    ["ws", uri, event type, data], ["rest", method, endpoint, body, status, response]
+    or ["ready"] / ["close"] for connection lifecycle events.
+    """
+    
+    FORMAT = 'lol-traffic'
+    VERSION = 1
+    FLUSH_EVERY = 100
+    
+    def __init__(self, path):
+        self.path = path
+        self._file = gzip.open(path, 'wt', encoding='utf-8')
+        self._start = time.monotonic()
+        self._unflushed = 0
+        self._lock = threading.Lock()
+        self._write({'format': self.FORMAT, 'version': self.VERSION, 'started': time.time()})
+    
+    def _write(self, record):
+        self._file.write(json.dumps(record, separators=(',', ':')) + '\n')
+    
+    def record(self, kind, *fields):
+        with self._lock:
+            if self._file is None:
+                return
+            self._write([round(time.monotonic() - self._start, 4), kind, *fields])
+            self._unflushed += 1
+            # Flush regularly so a file cut short by a hard exit is still readable
+            if kind != 'ws' or self._unflushed >= self.FLUSH_EVERY:
+                self._file.flush()
+                self._unflushed = 0
+    
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+class RecordingConnection:
+    """Wraps an LCU connection and records every REST exchange made through it."""
+    
+    def __init__(self, connection, recorder):
+        self._connection = connection
+        self._recorder = recorder
+    
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+    
+    async def request(self, method, endpoint, **kwargs):
+        resp = await self._connection.request(method, endpoint, **kwargs)
+        try:
+            payload = await read_lcu_json(resp)
+        except Exception:
+            payload = None
+        self._recorder.record('rest', method, endpoint, kwargs.get('json'), resp.status, payload)
+        return resp
+
+def traced_handler(kind):
+    """Decorate an LCU handler so its events and REST calls are recorded with --record-traffic."""
+    def decorator(handler):
+        @wraps(handler)
+        async def wrapper(connection, *args):
+            recorder = traffic_recorder
+            if recorder is None:
+                return await handler(connection, *args)
+            
+            if kind == 'ws':
+                event = args[0]
+                recorder.record('ws', event.uri, event.type, event.data)
+            else:
+                recorder.record(kind)
+            return await handler(RecordingConnection(connection, recorder), *args)
+        return wrapper
+    return decorator
+
+def load_traffic(path):
+    """Read a file written by TrafficRecorder. A missing gzip trailer is tolerated."""
+    records = []
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        try:
+            header = json.loads(f.readline())
+            if header.get('format') != TrafficRecorder.FORMAT:
+                raise ValueError(f"{path} is not an LCU traffic recording")
+            for line in f:
+                if line.strip():
+                    records.append(json.loads(line))
+        except EOFError:
+            # The recording process exited without closing the file
+            pass
+    return records
+
+class ReplayConnection:
+    """Answers LCU REST requests from recorded exchanges, in recorded order per endpoint."""
+    
+    def __init__(self, records):
+        self._responses = {}
+        for record in records:
+            if record[1] == 'rest':
+                _, _, method, endpoint, _, status, payload = record
+                self._responses.setdefault((method, endpoint), deque()).append((status, payload))
+        self.requests = 0
+    
+    async def request(self, method, endpoint, **kwargs):
+        self.requests += 1
+        responses = self._responses.get((method, endpoint))
+        if not responses:
+            return SyntheticResponse(404, {'message': f"Not recorded: {method} {endpoint}"})
+        # Keep serving the last recorded answer once the queue runs dry
+        status, payload = responses.popleft() if len(responses) > 1 else responses[0]
+        return SyntheticResponse(status, payload)
+
+class ReplayConnector(ConnectorEventManager):
+    """Offers the parts of the lcu_driver Connector that setup_connector() registers on."""
+    
+    def __init__(self):
+        super().__init__()
+        self.ws = WebsocketEventManager()
+    
+    def handlers_for(self, uri, event_type):
+        """Return the websocket handlers lcu_driver would call for this event."""
+        return [
+            registered['coroutine_or_callable']
+            for registered in self.ws.registered_uris
+            if (registered['uri'] == uri or (registered['uri'].endswith('/') and uri.startswith(registered['uri'])))
+            and event_type.upper() in registered['event_types']
+        ]
+
+async def replay_traffic(records, speed=1.0):
+    """Feed recorded traffic through the setup_connector() handlers.
+    
+    speed is a multiplier on the recorded pace; 0 replays as fast as possible.
+    Returns per-handler latencies in seconds and the total wall time.
+    """
+    conn = setup_connector(ReplayConnector())
+    connection = ReplayConnection(records)
+    latencies = {}
+    tasks = []
+    
+    def run_handler(handler, *args):
+        started = time.perf_counter()
+        task = asyncio.ensure_future(handler(connection, *args))
+        
+        def finished(_):
+            latencies.setdefault(handler.__name__, []).append(time.perf_counter() - started)
+        
+        task.add_done_callback(finished)
+        tasks.append(task)
+    
+    wall_start = time.perf_counter()
+    for record in records:
+        offset, kind = record[0], record[1]
+        if speed > 0:
+            delay = offset / speed - (time.perf_counter() - wall_start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        
+        if kind == 'ws':
+            _, _, uri, event_type, data = record
+            event = WebsocketEventResponse(event_type=event_type, uri=uri, data=data)
+            for handler in conn.handlers_for(uri, event_type):
+                run_handler(handler, event)
+        elif kind in ('ready', 'close'):
+            for handler in conn.handlers.get(kind, []):
+                run_handler(handler)
+        
+        # Give handlers a chance to run between events, as the websocket reader would
+        await asyncio.sleep(0)
+    
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return latencies, time.perf_counter() - wall_start
+
+def run_traffic_replay(path, speed=1.0):
+    """Replay a traffic recording and print handler throughput and latency."""
+    records = load_traffic(path)
+    events = sum(1 for record in records if record[1] != 'rest')
+    print(f"Replaying {events} events from {path} at {'max' if speed <= 0 else f'{speed:g}x'} speed")
+    
+    latencies, wall_time = asyncio.run(replay_traffic(records, speed))
+    
+    calls = sum(len(values) for values in latencies.values())
+    print(f"Handled {calls} handler calls in {wall_time:.3f} s "
+          f"({calls / wall_time if wall_time > 0 else 0:.0f} calls/s)")
+    for name, values in sorted(latencies.items()):
+        values.sort()
+        
+        def percentile(p):
+            return values[min(len(values) - 1, int(p * len(values)))] * 1000
+        
+        print(f"  {name}: {len(values)} calls, p50 {percentile(0.5):.2f} ms, "
+              f"p95 {percentile(0.95):.2f} ms, p99 {percentile(0.99):.2f} ms, max {values[-1] * 1000:.2f} ms")
+    return 0
+
 # --------------------------
 # LCU Connection setup
 # --------------------------
@@ -804,6 +2661,7 @@ def setup_connector(conn):
     """Set up the connector handlers."""
     
     @conn.ready
+    @traced_handler('ready')
     async def connect(connection):
         global summoner_name, summoner_tag, region, is_ready, current_phase
         print("[DEBUG] Connector ready handler invoked")
@@ -812,24 +2670,37 @@ def setup_connector(conn):
         # Get initial phase state
         try:
             resp = await connection.request('GET', '/lol-gameflow/v1/gameflow-phase')
-            current_phase = await resp.json()
+            current_phase = await read_lcu_json(resp)
             print(f"[INITIAL PHASE] {current_phase}")
         except Exception as e:
             print(f"Failed to get initial phase: {e}")
             current_phase = None
+        record_phase(current_phase)
         
         # Fetch summoner info
         await fetch_summoner_info(connection)
         
+    @conn.close
+    @traced_handler('close')
+    async def disconnect(connection):
+        global is_ready, current_phase
+        print("[DEBUG] Connector close handler invoked")
+        is_ready = False
+        current_phase = None
+        record_phase('Disconnected')
+        save_phase_timeline()
+        
     @conn.ws.register('/lol-summoner/v1/current-summoner', event_types=('UPDATE', 'CREATE'))
+    @traced_handler('ws')
     async def on_summoner_update(connection, event):
         global summoner_name, summoner_tag, region
         
         try:
             # Try to get information from event data
             if event.data:
-                summoner_name = event.data.get('gameName')
-                summoner_tag = event.data.get('tagLine')
+                summoner = Summoner.from_payload(event.data)
+                summoner_name = summoner.game_name
+                summoner_tag = summoner.tag_line
                 
                 # If we didn't get the info, try to get it directly
                 if not summoner_name or not summoner_tag:
@@ -837,9 +2708,9 @@ def setup_connector(conn):
                         # Try direct request to the endpoint
                         resp = await connection.request('GET', '/lol-summoner/v1/current-summoner')
                         if resp.status == 200:
-                            summoner_data = await resp.json()
-                            summoner_name = summoner_data.get('gameName')
-                            summoner_tag = summoner_data.get('tagLine')
+                            summoner = Summoner.from_payload(await read_lcu_json(resp))
+                            summoner_name = summoner.game_name
+                            summoner_tag = summoner.tag_line
                     except Exception as e:
                         print(f"Error getting summoner data: {e}")
                         
@@ -847,8 +2718,7 @@ def setup_connector(conn):
                 try:
                     region_resp = await connection.request('GET', '/riotclient/region-locale')
                     if region_resp.status == 200:
-                        region_data = await region_resp.json()
-                        region = region_data.get('region', '').upper()
+                        region = RegionLocale.from_payload(await read_lcu_json(region_resp)).region
                 except Exception as e:
                     print(f"Error getting region data: {e}")
                     
@@ -857,6 +2727,7 @@ def setup_connector(conn):
             print(f"Error in summoner update handler: {e}")
     
     @conn.ws.register('/lol-gameflow/v1/gameflow-phase')
+    @traced_handler('ws')
     async def on_gameflow_phase(connection, event):
         global current_phase
         try:
@@ -866,9 +2737,10 @@ def setup_connector(conn):
             else:
                 # If not a direct string, try to get current phase
                 resp = await connection.request('GET', '/lol-gameflow/v1/gameflow-phase')
-                current_phase = await resp.json()
+                current_phase = await read_lcu_json(resp)
             
             print(f"[GAMEFLOW] Phase changed to: {current_phase}")
+            record_phase(current_phase)
                 
         except Exception as e:
             print(f"[GAMEFLOW ERROR] {str(e)}")
@@ -876,6 +2748,40 @@ def setup_connector(conn):
     
     return conn
 
+def find_league_client_process():
+    """Return the running League client UX process, or None."""
+    for process in psutil.process_iter(attrs=['name']):
+        if process.info.get('name') in LCU_PROCESS_NAMES:
+            return process
+    return None
+
+async def run_lcu_connector(conn):
+    """Connect to the League client on the runtime loop and reconnect whenever it restarts.
+    
+    This replaces Connector.start(), which blocks a thread on its own run_until_complete.
+    """
+    print("Starting LCU connector...")
+    
+    while True:
+        try:
+            process = await runtime.call_blocking(find_league_client_process)
+            if process is None:
+                await asyncio.sleep(LCU_POLL_INTERVAL)
+                continue
+            
+            # Connection.init() registers itself with the connector and runs until the client closes
+            connection = Connection(conn, process)
+            connected_at = time.monotonic()
+            await connection.init()
+            print("League client connection closed, waiting for the client")
+            record_metric('lcu_disconnect', uptime_s=round(time.monotonic() - connected_at, 1))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[DEBUG] LCU connection failed: {e}, retrying in {LCU_RETRY_DELAY} seconds...")
+            record_metric('lcu_retry', error=type(e).__name__)
+            await asyncio.sleep(LCU_RETRY_DELAY)
+
 async def fetch_summoner_info(connection):
     global summoner_name, summoner_tag, region
     
@@ -883,16 +2789,15 @@ async def fetch_summoner_info(connection):
         # Try to get summoner info
         resp = await connection.request('GET', '/lol-summoner/v1/current-summoner')
         if resp.status == 200:
-            data = await resp.json()
-            summoner_name = data.get('gameName')
-            summoner_tag = data.get('tagLine')
+            summoner = Summoner.from_payload(await read_lcu_json(resp))
+            summoner_name = summoner.game_name
+            summoner_tag = summoner.tag_line
             
             # Try to get region
             try:
                 region_resp = await connection.request('GET', '/riotclient/region-locale')
                 if region_resp.status == 200:
-                    region_data = await region_resp.json()
-                    region = region_data.get('region', '').upper()
+                    region = RegionLocale.from_payload(await read_lcu_json(region_resp)).region
             except Exception:
                 pass
                 
@@ -902,15 +2807,328 @@ async def fetch_summoner_info(connection):
         print(f"Error fetching summoner info: {e}")
     return False
 
+# --------------------------
+# Memory profiling harness
+# --------------------------
+class SyntheticResponse:
+    """Minimal stand-in for an LCU HTTP response."""
+    
+    def __init__(self, status, payload):
+        self.status = status
+        self._body = json.dumps(payload).encode('utf-8')
+    
+    async def read(self):
+        return self._body
+    
+    async def json(self):
+        return json.loads(self._body)
+
+class SyntheticLobbyConnection:
+    """Stand-in for an LCU connection that serves a generated custom lobby list."""
+    
+    def __init__(self, lobby_count, owner_name, owner_tag):
+        self.lobbies = [
+            {
+                'id': 1000 + i,
+                'lobbyName': f"Custom lobby {i}",
+                'ownerDisplayName': f"Player{i} #EUW{i % 10}",
+                'gameMode': 'CLASSIC',
+                'mapId': 11,
+                'filledPlayerSlots': i % 10,
+                'maxPlayerSlots': 10,
+                'filledSpectatorSlots': 0,
+                'maxSpectatorSlots': 4,
+                'hasPassword': True,
+                'spectatorPolicy': 'AllAllowed',
+                'passbackUrl': '',
+                'partyId': f"{i:08x}-0000-0000-0000-000000000000",
+            }
+            for i in range(lobby_count - 1)
+        ]
+        # Put the lobby we are looking for last so the whole list is scanned
+        self.lobbies.append(dict(self.lobbies[-1] if self.lobbies else {}, id=999,
+                                 ownerDisplayName=f"{owner_name} #{owner_tag}"))
+    
+    async def request(self, method, endpoint, **kwargs):
+        if method == 'GET' and endpoint == '/lol-lobby/v2/lobby/custom/available':
+            return SyntheticResponse(200, self.lobbies)
+        if method == 'POST' and endpoint.endswith('/join'):
+            return SyntheticResponse(200, {})
+        return SyntheticResponse(404, {'message': f"No synthetic route for {method} {endpoint}"})
+
+def get_rss_bytes():
+    """Return the resident set size of this process in bytes, or None if unavailable."""
+    try:
+        if sys.platform == 'win32':
+            import ctypes
+            from ctypes import wintypes
+            
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [
+                    ('cb', wintypes.DWORD),
+                    ('PageFaultCount', wintypes.DWORD),
+                    ('PeakWorkingSetSize', ctypes.c_size_t),
+                    ('WorkingSetSize', ctypes.c_size_t),
+                    ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                    ('PagefileUsage', ctypes.c_size_t),
+                    ('PeakPagefileUsage', ctypes.c_size_t),
+                ]
+            
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            get_current_process = ctypes.windll.kernel32.GetCurrentProcess
+            get_current_process.restype = wintypes.HANDLE
+            get_memory_info = ctypes.windll.psapi.GetProcessMemoryInfo
+            get_memory_info.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESS_MEMORY_COUNTERS), wintypes.DWORD]
+            if get_memory_info(get_current_process(), ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize
+            return None
+        
+        if os.path.exists('/proc/self/statm'):
+            with open('/proc/self/statm') as f:
+                resident_pages = int(f.read().split()[1])
+            return resident_pages * os.sysconf('SC_PAGE_SIZE')
+        
+        # macOS: only the peak is available, reported in bytes
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except Exception as e:
+        print(f"Could not read RSS: {e}")
+        return None
+
+def format_bytes(value):
+    """Format a byte count as MB for reports."""
+    if value is None:
+        return "n/a"
+    return f"{value / (1024 * 1024):.1f} MB"
+
+def run_synthetic_join(lobby_count):
+    """Join a synthetic lobby list on the runtime loop. Returns (success, message, milliseconds)."""
+    connection = SyntheticLobbyConnection(lobby_count, 'Target', 'TAG')
+    start = time.perf_counter()
+    success, message = runtime.submit(
+        do_join_lobby(connection, 'Target', 'TAG', 'pin'), name='memory_report_join').result(60)
+    return success, message, (time.perf_counter() - start) * 1000
+
+def run_memory_report(lobby_count=2000, budget_mb=None):
+    """Measure steady-state idle memory and peak memory during a join.
+    
+    RSS is measured with tracemalloc off, since tracing costs both memory and
+    time; traced allocations come from a second join with tracing on. The
+    budget only applies to RSS. Idle traced memory is reported only when
+    tracing ran from interpreter start (python -X tracemalloc), otherwise most
+    of what is resident at idle was allocated before tracing could see it. In
+    that mode RSS still carries the tracing overhead, so the budget isn't checked.
+    
+    Returns a process exit code: 1 if a budget was given and exceeded, else 0.
+    """
+    global runtime, actions
+    
+    print(f"Memory report (low-memory mode: {'on' if low_memory_mode else 'off'})")
+    
+    # Build the same resources the tray app keeps alive while idle
+    icon = create_tray_icon()
+    if icon is None:
+        print("Tray icon unavailable, measuring without it")
+    try:
+        ensure_root_window()
+        if not low_memory_mode:
+            prewarm_dialogs()
+        release_root_window()
+    except tk.TclError as e:
+        print(f"No display available, skipping Tk root and dialogs: {e}")
+    runtime = AppRuntime().start()
+    actions = ActionExecutor()
+    report_connector = Connector(loop=runtime.loop)
+    setup_connector(report_connector)
+    
+    gc.collect()
+    idle_traced = None
+    if tracemalloc.is_tracing():
+        idle_traced, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        gc.collect()
+    idle_rss = get_rss_bytes()
+    
+    # RSS pass: run the join untraced, sampling RSS while it runs
+    rss_samples = [idle_rss or 0]
+    sampling = threading.Event()
+    def sample_rss():
+        while not sampling.wait(0.002):
+            rss_samples.append(get_rss_bytes() or 0)
+    sampler = threading.Thread(target=sample_rss, daemon=True, name='lol-rss-sampler')
+    sampler.start()
+    try:
+        success, message, join_ms = run_synthetic_join(lobby_count)
+    finally:
+        sampling.set()
+        sampler.join()
+    rss_samples.append(get_rss_bytes() or 0)
+    join_rss = max(rss_samples) if idle_rss is not None else None
+    
+    # Traced pass: the same join again, counting only what it allocates
+    gc.collect()
+    tracemalloc.start()
+    run_synthetic_join(lobby_count)
+    _, join_peak_traced = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    runtime.shutdown()
+    
+    idle_traced_text = format_bytes(idle_traced) if idle_traced is not None else "n/a (run with -X tracemalloc)"
+    print(f"Idle:  RSS {format_bytes(idle_rss)}, traced {idle_traced_text}")
+    print(f"Join:  RSS peak {format_bytes(join_rss)} ({lobby_count} lobbies, {join_ms:.1f} ms, "
+          f"{'ok' if success else message}), traced peak {format_bytes(join_peak_traced)}")
+    
+    del icon
+    
+    if budget_mb is not None and idle_traced is not None:
+        print("RSS includes tracemalloc overhead, run without -X tracemalloc to check the budget")
+    elif budget_mb is not None:
+        budget = budget_mb * 1024 * 1024
+        measured = [v for v in (idle_rss, join_rss) if v is not None]
+        if any(v > budget for v in measured):
+            print(f"Memory budget of {budget_mb} MB exceeded")
+            return 1
+    return 0
+
+def run_dialog_latency_benchmark(count=20):
+    """Open and close the password prompt count times and report click-to-focus latency.
+    
+    Each round starts the clock before the window is fetched, as a menu click
+    does, and closes the prompt as soon as its input field has focus.
+    """
+    frame_ms = 1000 / 60
+    try:
+        ensure_root_window()
+        if not low_memory_mode:
+            prewarm_dialogs()
+    except tk.TclError as e:
+        print(f"No display available, cannot measure dialog latency: {e}")
+        return 1
+    
+    latencies = []
+    missed = 0
+    for _ in range(count):
+        started = time.perf_counter()
+        window = acquire_dialog_window(PromptWindow)
+        window.last_latency_ms = None
+        deadline = started + 1.0
+        
+        def close_when_ready(window=window, deadline=deadline):
+            if window.last_latency_ms is not None or time.perf_counter() > deadline:
+                window.close(None)
+            else:
+                window.window.after(1, close_when_ready)
+        
+        window.window.after(1, close_when_ready)
+        window.ask("Join Game", "Enter match password:", started=started)
+        if window.last_latency_ms is None:
+            missed += 1
+        else:
+            latencies.append(window.last_latency_ms)
+        release_dialog_window(window)
+    
+    print(f"Prompt click-to-focus over {count} opens (low-memory mode: {'on' if low_memory_mode else 'off'})")
+    if latencies:
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        within = sum(1 for ms in latencies if ms <= frame_ms)
+        print(f"  median {latencies[len(latencies) // 2]:.1f} ms, p95 {p95:.1f} ms, max {latencies[-1]:.1f} ms")
+        print(f"  {within}/{len(latencies)} within one frame ({frame_ms:.1f} ms)")
+    if missed:
+        print(f"  {missed} opens never received focus")
+    return 0
+
 # --------------------------
 # Application entry point
 # --------------------------
-def main():
-    global app_icon, root, connector
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="League of Leagues Client")
+    parser.add_argument('--low-memory', action='store_true',
+                        help="Create GUI resources only while a dialog is open")
+    parser.add_argument('--memory-report', action='store_true',
+                        help="Print idle and join memory usage, then exit")
+    parser.add_argument('--memory-budget-mb', type=float, default=None,
+                        help="With --memory-report, exit with status 1 if RSS goes over this many MB")
+    parser.add_argument('--lobby-count', type=int, default=2000,
+                        help="Size of the synthetic custom lobby list for --memory-report and --bench-lobby-decode")
+    parser.add_argument('--bench-lobby-decode', action='store_true',
+                        help="Compare lobby list decode time and memory on --lobby-count synthetic lobbies, then exit")
+    parser.add_argument('--bench-dialogs', action='store_true',
+                        help="Measure click-to-focus latency of the password prompt, then exit")
+    parser.add_argument('--join', metavar='PASSWORD',
+                        help="Join a match by password (handled by the running instance if there is one)")
+    parser.add_argument('--record-traffic', metavar='PATH',
+                        help="Record LCU websocket events and REST exchanges to PATH (gzip JSON lines)")
+    parser.add_argument('--replay-traffic', metavar='PATH',
+                        help="Replay a traffic recording through the LCU handlers, print throughput and latency, then exit")
+    parser.add_argument('--replay-speed', type=float, default=1.0,
+                        help="With --replay-traffic, speed multiplier (1 = recorded pace, 0 = as fast as possible)")
+    parser.add_argument('--export-timeline', action='store_true',
+                        help="Write the gameflow phase timeline to phase_timeline.json in the AppData directory")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    global app_icon, root, connector, runtime, actions, low_memory_mode, phase_timeline, telemetry
+    global traffic_recorder
+    
+    args = parse_args(argv)
+    low_memory_mode = args.low_memory or load_config().get('low_memory', False)
+    
+    if args.memory_report:
+        sys.exit(run_memory_report(args.lobby_count, args.memory_budget_mb))
+    
+    if args.bench_lobby_decode:
+        sys.exit(run_lobby_decode_benchmark(args.lobby_count))
+    
+    if args.bench_dialogs:
+        sys.exit(run_dialog_latency_benchmark())
+    
+    if args.replay_traffic:
+        sys.exit(run_traffic_replay(args.replay_traffic, args.replay_speed))
+    
+    # Hand off to the running instance before paying for the UI, tray icon or LCU connection
+    if not acquire_instance_lock():
+        if forward_to_running_instance(command_from_args(args)):
+            print("Forwarded to the running instance, exiting")
+        else:
+            print("Another instance is running but did not respond, exiting")
+        return
+    
+    # Keep a timeline of gameflow phases, continuing the stored one if the player opted in
+    phase_timeline = PhaseTimeline()
+    if load_config().get('persist_timeline') and os.path.exists(PHASE_TIMELINE_PATH):
+        try:
+            phase_timeline.load(PHASE_TIMELINE_PATH)
+        except Exception as e:
+            print(f"Error loading phase timeline: {e}")
+    
+    # Nothing is running, so export what was stored by earlier sessions
+    if args.export_timeline:
+        export_phase_timeline()
+        print(phase_timeline.summary())
+        return
     
     try:
-        # Initialize UI
-        root = ensure_root_window()
+        # Start the runtime that owns the asyncio loop and worker pool
+        runtime = AppRuntime().start()
+        actions = ActionExecutor()
+        
+        # Accept commands from later launches straight away; a second launch only waits
+        # a couple of seconds, far less than signing in can take
+        try:
+            runtime.submit(start_command_server(handle_forwarded_command), name='command_server').result(5)
+        except Exception as e:
+            print(f"Could not start command server: {e}")
+        
+        # Initialize UI (in low-memory mode the root only exists while a dialog is open)
+        if not low_memory_mode:
+            root = ensure_root_window()
+            prewarm_dialogs()
         
         # Create and run the system tray icon
         app_icon = create_tray_icon()
@@ -918,8 +3136,22 @@ def main():
             print("Failed to create system tray icon, exiting.")
             return
         
-        # Initialize LCU connector in the main thread
-        connector = Connector()
+        # Pick the fastest backend among the configured ones and watch for outages
+        configure_backend_endpoints(load_config().get('api_endpoints'))
+        runtime.submit(monitor_backends(), name='backend_monitor')
+        
+        # Telemetry is opt-in; without it record_metric() is a no-op
+        if load_config().get('telemetry'):
+            telemetry = TelemetryBuffer(TELEMETRY_PATH)
+            runtime.submit(telemetry.run(), name='telemetry')
+        
+        # Record LCU traffic for offline replay when asked to
+        if args.record_traffic:
+            traffic_recorder = TrafficRecorder(args.record_traffic)
+            print(f"Recording LCU traffic to {args.record_traffic}")
+        
+        # Initialize LCU connector on the runtime loop
+        connector = Connector(loop=runtime.loop)
         setup_connector(connector)
         
         # Attempt authentication if we have stored credentials
@@ -928,53 +3160,44 @@ def main():
         
         if raw_id:
             try:
-                auth_success = authenticate(raw_id)
+                auth_success = authenticate_stored(raw_id)
                 if auth_success:
                     print("Successfully authenticated with stored credentials")
                 else:
                     print("Authentication failed with stored credentials")
-                    delete_config()
+                    delete_credentials()
+            except BackendError as e:
+                # The server is down or confused, that says nothing about the stored registration
+                print(f"Could not verify stored credentials, keeping them: {e}")
             except Exception as e:
                 print(f"Error during authentication: {e}")
         
-        # Start connector in a separate thread
-        def start_connector():
-            try:
-                print("Starting LCU connector...")
-                # Try to start the connector with retries
-                max_attempts = 30
-                attempts = 0
-                
-                while attempts < max_attempts:
-                    try:
-                        connector.start()
-                        print("[DEBUG] Connector.start() succeeded")
-                        break
-                    except Exception as e:
-                        attempts += 1
-                        print(f"[DEBUG] LCU connection failed: {e}, retrying in 10 seconds... (Attempt {attempts}/{max_attempts})")
-                        time.sleep(10)
-                
-                if attempts >= max_attempts:
-                    print("Failed to connect to the League client after multiple attempts.")
-            except Exception as e:
-                print(f"Error starting connector: {e}")
-                traceback.print_exc()
+        # Keep the LCU connection alive on the runtime loop
+        runtime.submit(run_lcu_connector(connector), name='lcu_connector')
         
-        # Start the connector in a background thread
-        threading.Thread(target=start_connector, daemon=True).start()
+        # A --join given to the first instance waits until the League client is ready
+        if args.join:
+            async def join_when_ready():
+                for _ in range(120):
+                    if is_ready and current_phase is not None:
+                        handle_forwarded_command(command_from_args(args))
+                        return
+                    await asyncio.sleep(1)
+                print("League client not ready, dropping --join request")
+            runtime.submit(join_when_ready(), name='join_when_ready')
         
         # Set up a Tkinter timer to process events
         def process_events():
             try:
                 if root and root.winfo_exists():
                     root.update()
-                root.after(100, process_events)  # Schedule again
+                    root.after(100, process_events)  # Schedule again
             except Exception as e:
                 print(f"Error processing events: {e}")
         
         # Start processing events
-        root.after(100, process_events)
+        if root:
+            root.after(100, process_events)
         
         # Run the system tray icon (this blocks the main thread)
         print("Starting system tray icon...")
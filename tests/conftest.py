@@ -0,0 +1,119 @@
+import gzip
+import http.server
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+import pytest
+
+# Keep settings and other AppData files out of the real profile, and let pystray
+# import without a desktop session
+os.environ['LOCALAPPDATA'] = tempfile.mkdtemp(prefix='lol-tests-')
+os.environ.setdefault('PYSTRAY_BACKEND', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import leagueofleagues_client as client  # noqa: E402
+
+
+class StandInServer:
+    """Local HTTP stand-in for the backend with adjustable latency and status code."""
+    
+    def __init__(self, delay=0.0, status=200, body=b'{"version": "1.0.0"}'):
+        self.delay = delay
+        self.status = status
+        self.body = body
+        self.requests = []  # (method, path)
+        self.batches = []  # Decoded telemetry payloads
+        
+        server = self
+        
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def _answer(self):
+                server.requests.append((self.command, self.path))
+                time.sleep(server.delay)
+                self.send_response(server.status)
+                self.end_headers()
+                self.wfile.write(server.body)
+            
+            def do_GET(self):
+                self._answer()
+            
+            def do_POST(self):
+                data = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if self.headers.get('Content-Encoding') == 'gzip' and server.status < 300:
+                    server.batches.append(json.loads(gzip.decompress(data)))
+                self._answer()
+            
+            def log_message(self, *args):
+                pass
+        
+        self.httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+    
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def stand_in():
+    """Factory for stand-in servers, all shut down after the test."""
+    servers = []
+    
+    def make(**kwargs):
+        servers.append(StandInServer(**kwargs))
+        return servers[-1]
+    
+    yield make
+    for server in servers:
+        server.close()
+
+
+@pytest.fixture
+def unused_url():
+    """URL of a local port nothing listens on."""
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return f"http://127.0.0.1:{port}"
+
+
+@pytest.fixture
+def runtime(monkeypatch):
+    """A running AppRuntime installed as the module's runtime."""
+    rt = client.AppRuntime().start()
+    monkeypatch.setattr(client, 'runtime', rt)
+    yield rt
+    # Let cancelled tasks unwind on the loop before it stops
+    rt.cancel_all()
+    time.sleep(0.05)
+    rt.shutdown()
+
+
+@pytest.fixture
+def endpoints(monkeypatch):
+    """Install an EndpointSelector over the given base URLs for the test."""
+    def install(*urls):
+        selector = client.EndpointSelector(list(urls))
+        monkeypatch.setattr(client, 'backend_endpoints', selector)
+        return selector
+    return install
+
+
+@pytest.fixture
+def wait_for():
+    """Poll condition() until it is true or the timeout passes."""
+    def poll(condition, timeout=3.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if condition():
+                return True
+            time.sleep(0.01)
+        return condition()
+    return poll
@@ -0,0 +1,39 @@
+import threading
+
+import leagueofleagues_client as client
+
+
+def test_click_while_prompt_is_open_is_coalesced(runtime, monkeypatch, wait_for):
+    notes = []
+    prompts = []
+    joined = threading.Event()
+    monkeypatch.setattr(client, 'actions', client.ActionExecutor())
+    monkeypatch.setattr(client, 'notify', lambda message, title="": notes.append(message))
+    monkeypatch.setattr(client, 'is_ready', True)
+    monkeypatch.setattr(client, 'current_phase', 'None')
+    monkeypatch.setattr(client, 'join_with_password', lambda pwd: joined.set())
+    
+    def ask_for_input(title, prompt, started=None):
+        prompts.append(title)
+        # The tray keeps handling clicks while the prompt's nested loop runs
+        client.join_game_action(None, None)
+        return 'secret'
+    monkeypatch.setattr(client, 'ask_for_input', ask_for_input)
+    
+    client.join_game_action(None, None)
+    
+    assert prompts == ['Join Game']
+    assert "Join Game is already in progress." in notes
+    assert joined.wait(2)
+    assert wait_for(lambda: not client.actions.is_running('join'))
+
+
+def test_cancelled_prompt_releases_the_action(monkeypatch):
+    monkeypatch.setattr(client, 'actions', client.ActionExecutor())
+    monkeypatch.setattr(client, 'is_ready', True)
+    monkeypatch.setattr(client, 'current_phase', 'None')
+    monkeypatch.setattr(client, 'ask_for_input', lambda *args, **kwargs: None)
+    
+    client.join_game_action(None, None)
+    
+    assert not client.actions.is_running('join')
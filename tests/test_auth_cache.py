@@ -0,0 +1,31 @@
+import base64
+import json
+import time
+
+import leagueofleagues_client as client
+
+
+def make_token(discord_id, exp):
+    claims = json.dumps({'discord_id': discord_id, 'exp': exp}).encode()
+    return base64.urlsafe_b64encode(claims).rstrip(b'=').decode() + '.sig'
+
+
+def test_cached_token_is_read_until_it_expires():
+    now = time.time()
+    token = make_token('1234', now + 60)
+    
+    assert client.read_auth_token(token, '1234', now=now) == now + 60
+    assert client.read_auth_token(token, '1234', now=now + 61) is None
+    assert client.read_auth_token(token, '5678', now=now) is None
+    assert client.read_auth_token('not a token', '1234', now=now) is None
+
+
+def test_stored_token_replaces_old_signing_key():
+    client.update_config(discord_id='1234', auth_key='00' * 32)
+    
+    assert client.store_auth_token('1234', make_token('1234', time.time() + 60))
+    
+    config = client.load_config()
+    assert client.read_auth_token(config['auth_token'], '1234') is not None
+    with open(client.CONFIG_PATH) as f:
+        assert 'auth_key' not in f.read()
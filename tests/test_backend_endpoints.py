@@ -0,0 +1,92 @@
+import time
+
+import pytest
+
+import leagueofleagues_client as client
+
+
+def open_circuit(path=client.VERSION_PATH):
+    """Fail calls until every endpoint's circuit is open."""
+    for _ in range(client.BACKEND_FAILURE_THRESHOLD):
+        with pytest.raises(client.BackendUnavailable):
+            client.backend_request('GET', path, timeout=1)
+
+
+def test_fastest_endpoint_is_tried_first(stand_in, endpoints):
+    slow = stand_in(delay=0.15)
+    fast = stand_in(delay=0.01)
+    selector = endpoints(slow.url, fast.url)
+    
+    for endpoint in selector.endpoints:
+        assert client.probe_endpoint(endpoint)
+    assert selector.best().base_url == fast.url
+    
+    before = len(slow.requests)
+    for _ in range(3):
+        assert client.backend_request('GET', client.VERSION_PATH).status_code == 200
+    assert len(slow.requests) == before
+    assert len(fast.requests) == 4
+
+
+def test_fails_over_on_server_error(stand_in, endpoints):
+    broken = stand_in(status=503)
+    working = stand_in(delay=0.05)
+    selector = endpoints(broken.url, working.url)
+    
+    resp = client.backend_request('GET', client.JOINMATCH_PATH)
+    
+    assert resp.status_code == 200
+    assert broken.requests and working.requests
+    # The endpoint that just failed is no longer preferred or counted as up
+    assert selector.best().base_url == working.url
+    assert "1/2 endpoints up" in selector.status_text()
+
+
+def test_fails_over_on_connection_error(stand_in, endpoints, unused_url):
+    working = stand_in()
+    selector = endpoints(unused_url, working.url)
+    
+    for _ in range(3):
+        assert client.backend_request('GET', client.AUTH_PATH, timeout=1).status_code == 200
+    
+    # After failing once the dead endpoint drops behind the working one and isn't tried again
+    dead = selector.endpoints[0]
+    assert not dead.breaker.healthy
+    assert len(dead.breaker._failures) == 1
+    assert selector.candidates()[-1] is dead
+    assert len(working.requests) == 3
+
+
+def test_raises_when_every_endpoint_fails(stand_in, endpoints, unused_url):
+    broken = stand_in(status=500)
+    endpoints(broken.url, unused_url)
+    
+    with pytest.raises(client.BackendUnavailable):
+        client.backend_request('GET', client.VERSION_PATH, timeout=1)
+
+
+def test_open_circuit_fails_fast_and_recovers(runtime, stand_in, endpoints, monkeypatch, wait_for):
+    monkeypatch.setattr(client, 'BACKEND_RESET_TIMEOUT', 0.1)
+    server = stand_in(status=503)
+    selector = endpoints(server.url)
+    breaker = selector.endpoints[0].breaker
+    breaker.reset_timeout = 0.1
+    runtime.submit(client.monitor_backends(), name='backend_monitor')
+    assert wait_for(lambda: client.backend_monitor_wake is not None)
+    
+    open_circuit()
+    assert breaker.state == client.CircuitBreaker.OPEN
+    
+    # While open, calls don't reach the server at all
+    seen = len(server.requests)
+    start = time.perf_counter()
+    with pytest.raises(client.BackendUnavailable):
+        client.backend_request('GET', client.VERSION_PATH)
+    assert time.perf_counter() - start < 0.05
+    assert len(server.requests) == seen
+    
+    # The monitor probes the endpoint and closes the circuit once the server answers
+    server.status = 200
+    assert wait_for(lambda: breaker.state == client.CircuitBreaker.CLOSED)
+    assert client.backend_request('GET', client.VERSION_PATH).status_code == 200
+    assert selector.status_text().startswith("Reachable")
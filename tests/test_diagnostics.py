@@ -0,0 +1,48 @@
+import threading
+from functools import partial
+
+import leagueofleagues_client as client
+
+
+def busy(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(200))
+
+
+def test_report_while_sampling(wait_for):
+    stop = threading.Event()
+    worker = threading.Thread(target=busy, args=(stop,), name='busy')
+    worker.start()
+    profiler = client.SamplingProfiler(interval=0.001)
+    profiler.start()
+    try:
+        assert wait_for(lambda: profiler.sample_count)
+        for _ in range(300):
+            profiler.report()
+            profiler.collapsed()
+    finally:
+        profiler.stop()
+        stop.set()
+        worker.join()
+    
+    assert profiler.sample_count
+    assert 'busy' in profiler.report()
+
+
+def test_run_that_times_out_is_saved_not_replaced(runtime, monkeypatch, wait_for):
+    saved = []
+    monkeypatch.setattr(client, 'actions', client.ActionExecutor())
+    monkeypatch.setattr(client, 'save_diagnostics_bundle', lambda: saved.append(client.profiler))
+    monkeypatch.setattr(client, 'profiler', None)
+    monkeypatch.setattr(client, 'SamplingProfiler', partial(client.SamplingProfiler, max_seconds=0.05))
+    
+    client.toggle_profiler_action(None, None)
+    first = client.profiler
+    assert wait_for(lambda: saved)
+    assert saved == [first] and not client.profiler_running()
+    
+    # The bundle write was stubbed out, so the samples still count as unsaved
+    saved.clear()
+    client.toggle_profiler_action(None, None)
+    assert wait_for(lambda: saved)
+    assert client.profiler is first and not client.profiler_running()
@@ -0,0 +1,16 @@
+import leagueofleagues_client as client
+
+
+def test_exact_owner_wins_over_earlier_prefix_match():
+    lobbies = [
+        {'id': 1, 'ownerDisplayName': 'Target#EUW'},
+        {'id': 2, 'ownerDisplayName': 'target #tag'},
+        {'id': 3},
+    ]
+    
+    match = client.find_lobby(lobbies, 'Target', 'TAG')
+    assert (match.id, match.owner_display_name) == (2, 'target #tag')
+    
+    match = client.find_lobby(lobbies, 'Target', 'NA1')
+    assert match.id == 1
+    assert client.find_lobby(lobbies, 'Other', 'TAG') is None
@@ -0,0 +1,72 @@
+import leagueofleagues_client as client
+
+
+def make_buffer(runtime, **kwargs):
+    buffer = client.TelemetryBuffer(client.TELEMETRY_PATH, **kwargs)
+    runtime.submit(buffer.run(), name='telemetry')
+    return buffer
+
+
+def test_flushes_when_batch_size_is_reached(runtime, stand_in, endpoints, wait_for):
+    collector = stand_in()
+    endpoints(collector.url)
+    buffer = make_buffer(runtime, batch_size=5, flush_interval=60)
+    assert wait_for(lambda: buffer._wake is not None)
+    
+    for i in range(4):
+        buffer.record('join_stage', step=i)
+    assert not wait_for(lambda: collector.batches, timeout=0.3)
+    
+    buffer.record('join_stage', step=4)
+    assert wait_for(lambda: collector.batches)
+    assert [e['step'] for e in collector.batches[0]['events']] == [0, 1, 2, 3, 4]
+    assert collector.requests[0] == ('POST', client.TELEMETRY_PATH)
+    assert buffer.sent == 5 and len(buffer) == 0
+
+
+def test_flushes_on_timer(runtime, stand_in, endpoints, wait_for):
+    collector = stand_in()
+    endpoints(collector.url)
+    buffer = make_buffer(runtime, batch_size=100, flush_interval=0.2)
+    
+    buffer.record('lcu_reconnect', attempts=2)
+    assert wait_for(lambda: collector.batches)
+    batch = collector.batches[0]
+    assert batch['session'] == buffer.session_id
+    assert batch['events'][0]['kind'] == 'lcu_reconnect'
+
+
+def test_drops_batches_when_offline(endpoints, unused_url):
+    selector = endpoints(unused_url)
+    buffer = client.TelemetryBuffer(client.TELEMETRY_PATH)
+    for i in range(3):
+        buffer.record('auth', ok=True)
+    
+    buffer.flush_now(timeout=1)
+    
+    assert len(buffer) == 0
+    assert buffer.dropped == 3 and buffer.sent == 0
+    assert selector.best().breaker.state == client.CircuitBreaker.CLOSED
+
+
+def test_collector_errors_do_not_open_the_circuit(stand_in, endpoints):
+    collector = stand_in(status=503)
+    selector = endpoints(collector.url)
+    buffer = client.TelemetryBuffer(client.TELEMETRY_PATH, batch_size=1)
+    
+    for i in range(client.BACKEND_FAILURE_THRESHOLD + 1):
+        buffer.record('auth', ok=True)
+        assert not buffer.send_batch(buffer.take_batch())
+    
+    assert selector.best().breaker.state == client.CircuitBreaker.CLOSED
+    assert selector.best().breaker.allow()
+
+
+def test_buffer_is_bounded():
+    buffer = client.TelemetryBuffer(client.TELEMETRY_PATH, max_events=10, batch_size=100)
+    for i in range(25):
+        buffer.record('tick', i=i)
+    
+    assert len(buffer) == 10
+    assert buffer.dropped == 15
+    assert [e['i'] for e in buffer.take_batch()] == list(range(15, 25))